@@ -1,11 +1,13 @@
 """Main coding agent that coordinates all components."""
 
 import subprocess
+import sys
 import time
 from typing import List, Dict, Any
 from .types import Context, ConfirmationAction, ToolResult
 from .config import ConfigManager, AgentConfig
 from .providers.ollama import OllamaProvider
+from .providers.cached import CachedProvider, DEFAULT_CACHE_DIR
 from .prompt_manager import PromptManager
 from .tools.registry import ToolRegistry
 from .tools.file_tools import ReadFileTool, WriteFileTool, SearchFilesTool
@@ -41,6 +43,10 @@ from .indexer.file_indexer import FileIndexer
 from .cache_service import CacheService
 
 
+# Disk-cached generated code older than this is regenerated (seconds)
+CODEGEN_CACHE_TTL = 7 * 24 * 3600
+
+
 class CodingAgent:
     """Main coding agent that coordinates all components."""
     
@@ -119,15 +125,31 @@ class CodingAgent:
         self.tool_registry.register(RunTestsTool())
         self.tool_registry.register(LintCodeTool())
         
-        # Analysis tools (pass model provider for LLM analysis)
-        self.tool_registry.register(SummarizeCodeTool(self.model_provider))
-        self.tool_registry.register(AnalyzeCodeTool(self.model_provider))
+        # Long LLM responses can be echoed to the console as they stream in
+        stream_callback = self._echo_stream if self.config.execution.stream_output else None
+        
+        # Analysis tools (pass model provider for LLM analysis; when caching is
+        # enabled, responses are cached on disk so unchanged code is not
+        # re-summarized across runs)
+        analysis_provider = self.model_provider
+        if self.config.database.cache_enabled:
+            analysis_provider = CachedProvider(self.model_provider)
+        self.tool_registry.register(SummarizeCodeTool(analysis_provider, stream_callback=stream_callback))
+        self.tool_registry.register(AnalyzeCodeTool(analysis_provider, stream_callback=stream_callback))
         
         # Directive management tool
         self.tool_registry.register(DirectiveManagementTool(self.config_manager))
         
-        # Code generation and development tools
-        self.tool_registry.register(CodeGeneratorTool(self.model_provider))
+        # Code generation and development tools (when caching is enabled,
+        # LLM-generated code is also cached on disk so identical requests
+        # across runs skip the model)
+        codegen_cache = self.config.database.cache_enabled
+        codegen_provider = self.model_provider
+        if codegen_cache:
+            codegen_provider = CachedProvider(self.model_provider, cache_dir=DEFAULT_CACHE_DIR.parent / "codegen",
+                                              ttl=CODEGEN_CACHE_TTL)
+        self.tool_registry.register(CodeGeneratorTool(codegen_provider, enable_cache=codegen_cache,
+                                                      stream_callback=stream_callback))
         
         # Project scaffolding tool
         from .tools.project_scaffolding_tool import ProjectScaffoldingTool
@@ -169,15 +191,22 @@ class CodingAgent:
         # Advanced code analysis tools
         self.tool_registry.register(AntiPatternParser())
         self.tool_registry.register(SemanticSearchTool())
-        self.tool_registry.register(CodeQualityMetricsTool())
+        self.tool_registry.register(CodeQualityMetricsTool(enable_cache=self.config.database.cache_enabled))
         self.tool_registry.register(IntelligentCodeReviewTool(self.model_provider))
         self.tool_registry.register(SmartRefactoringTool())
-        self.tool_registry.register(ContextAwareCodeGenerator(self.model_provider))
+        self.tool_registry.register(ContextAwareCodeGenerator(self.model_provider,
+                                                              enable_cache=self.config.database.cache_enabled))
         self.tool_registry.register(IntelligentDebuggingTool(self.model_provider))
         self.tool_registry.register(TechnicalDebtTracker())
         self.tool_registry.register(CodeReviewAssistant(self.model_provider))
         self.tool_registry.register(DocumentationSyncTool(self.model_provider))
     
+    @staticmethod
+    def _echo_stream(chunk: str):
+        """Write a streamed response chunk to the console immediately."""
+        sys.stdout.write(chunk)
+        sys.stdout.flush()
+    
     def process_request(self, user_prompt: str) -> str:
         """Process a user request with multi-step planning and execution."""
         start_time = time.time()
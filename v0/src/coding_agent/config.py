@@ -34,6 +34,8 @@ class ExecutionConfig(BaseModel):
     """Execution behavior configuration settings."""
     auto_continue: bool = False
     show_tool_output: list = []
+    # Echo LLM summaries, analyses and generated code to the console as they stream in
+    stream_output: bool = False
 
 
 class DirectiveConfig(BaseModel):
@@ -131,6 +133,7 @@ class ConfigManager:
             
             # Execution settings
             "CODING_AGENT_AUTO_CONTINUE": ["execution", "auto_continue"],
+            "CODING_AGENT_STREAM_OUTPUT": ["execution", "stream_output"],
             
             # General settings
             "CODING_AGENT_DEBUG": ["debug"]
@@ -144,7 +147,7 @@ class ConfigManager:
                     value = float(value)
                 elif path[-1] in ["max_tokens", "max_summaries"]:
                     value = int(value) if value else None
-                elif path[-1] in ["cache_enabled", "watch_enabled", "debug", "auto_continue"]:
+                elif path[-1] in ["cache_enabled", "watch_enabled", "debug", "auto_continue", "stream_output"]:
                     value = value.lower() in ["true", "1", "yes", "on"]
                 
                 # Set nested value
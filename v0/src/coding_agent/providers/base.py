@@ -1,18 +1,54 @@
 """Base model provider interface."""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional
 from ..types import ModelResponse
 
 
 class ModelProvider(ABC):
     """Abstract base class for model providers."""
     
+    # Concurrent requests issued by the default generate_batch
+    batch_workers: int = 4
+    
     @abstractmethod
     def generate(self, prompt: str, **kwargs) -> ModelResponse:
         """Generate a response from the model."""
         pass
     
+    def generate_batch(self, prompts: List[str], **kwargs) -> List[ModelResponse]:
+        """Generate responses for independent prompts, in prompt order.
+        
+        The default issues generate() calls concurrently; providers with a
+        native batch API can override this.
+        """
+        if len(prompts) <= 1:
+            return [self.generate(prompt, **kwargs) for prompt in prompts]
+        
+        with ThreadPoolExecutor(max_workers=min(len(prompts), self.batch_workers)) as executor:
+            return list(executor.map(lambda prompt: self.generate(prompt, **kwargs), prompts))
+    
+    def generate_with_prefix(self, prefix: str, suffix: str, **kwargs) -> ModelResponse:
+        """Generate from a prompt split into a static prefix and a per-call suffix.
+        
+        Providers with explicit prompt caching can mark the prefix as cacheable.
+        The default sends the concatenation, which still lets servers that reuse
+        the KV cache for a shared prompt prefix (such as Ollama) skip its prefill.
+        """
+        return self.generate(prefix + suffix, **kwargs)
+    
+    def generate_stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        """Yield the response text in chunks as the model produces it.
+        
+        The default yields the whole generate() response at once; providers
+        with a streaming API override this to cut time to first token, and
+        must raise rather than end quietly if the stream is cut short.
+        """
+        content = self.generate(prompt, **kwargs).content
+        if content:
+            yield content
+    
     @abstractmethod
     def is_available(self) -> bool:
         """Check if the provider is available."""
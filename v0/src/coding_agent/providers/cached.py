@@ -0,0 +1,176 @@
+"""Disk-backed response cache wrapping another model provider."""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from .base import ModelProvider
+from ..types import ModelResponse
+
+
+# Default location for cached LLM responses
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "coding_agent" / "summaries"
+# Responses kept per cache directory; least recently used ones beyond this are deleted
+DEFAULT_MAX_ENTRIES = 2000
+
+
+class CachedProvider(ModelProvider):
+    """Serve repeated prompts from disk instead of re-invoking the model.
+    
+    Entries are keyed by a hash of the model id, generation options and the
+    full prompt, so any change to the gathered code or the requested focus is
+    a miss. Failed (empty) responses are never stored. With a ttl (seconds),
+    entries older than that are treated as misses and regenerated. Each call
+    that stores something (a whole batch counts as one) then trims the
+    directory to max_entries, dropping the least recently used entries (hits
+    refresh a file's access time) and any expired ones.
+    """
+    
+    def __init__(self, provider: ModelProvider, cache_dir: Optional[Path] = None, ttl: Optional[float] = None,
+                 max_entries: Optional[int] = DEFAULT_MAX_ENTRIES):
+        self.provider = provider
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.batch_workers = provider.batch_workers
+    
+    def _key(self, prompt: str, kwargs: Dict) -> str:
+        """Hash the model id, options and prompt into a cache key."""
+        model_id = getattr(self.provider, "model", type(self.provider).__name__)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{model_id}\0{json.dumps(kwargs, sort_keys=True, default=str)}\0".encode("utf-8"))
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+    
+    def _load(self, key: str) -> Optional[ModelResponse]:
+        """Return the cached response for a key, if present, fresh and readable."""
+        path = self.cache_dir / f"{key}.json"
+        try:
+            st = path.stat()
+            if self.ttl is not None and time.time() - st.st_mtime > self.ttl:
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            # Mark as recently used; the mtime is kept so the ttl still measures age
+            os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+            return ModelResponse(content=data["content"], metadata={**data.get("metadata", {}), "cached": True})
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+    
+    def _store(self, key: str, response: ModelResponse) -> bool:
+        """Persist a successful response, returning whether it was written.
+        
+        Cache write failures are ignored.
+        """
+        if not response.content:
+            return False
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self.cache_dir / f"{key}.json"
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"content": response.content, "metadata": response.metadata}, f, default=str)
+            os.replace(tmp_path, path)
+        except OSError:
+            return False
+        return True
+    
+    def _trim(self):
+        """Delete expired entries and the least recently used ones beyond max_entries."""
+        entries = []
+        expired_before = time.time() - self.ttl if self.ttl is not None else None
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    if expired_before is not None and st.st_mtime < expired_before:
+                        self._remove(entry.path)
+                    else:
+                        entries.append((st.st_atime_ns, entry.path))
+        except OSError:
+            return
+        
+        if self.max_entries is not None and len(entries) > self.max_entries:
+            entries.sort()
+            for _, path in entries[:len(entries) - self.max_entries]:
+                self._remove(path)
+    
+    @staticmethod
+    def _remove(path: str):
+        """Delete a cache file, ignoring files already gone."""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    
+    def generate(self, prompt: str, **kwargs) -> ModelResponse:
+        """Return a cached response, or generate and cache a new one."""
+        key = self._key(prompt, kwargs)
+        cached = self._load(key)
+        if cached is not None:
+            return cached
+        
+        response = self.provider.generate(prompt, **kwargs)
+        if self._store(key, response):
+            self._trim()
+        return response
+    
+    def generate_with_prefix(self, prefix: str, suffix: str, **kwargs) -> ModelResponse:
+        """Return a cached response, or generate one keeping the prefix split."""
+        key = self._key(prefix + suffix, kwargs)
+        cached = self._load(key)
+        if cached is not None:
+            return cached
+        
+        response = self.provider.generate_with_prefix(prefix, suffix, **kwargs)
+        if self._store(key, response):
+            self._trim()
+        return response
+    
+    def generate_batch(self, prompts: List[str], **kwargs) -> List[ModelResponse]:
+        """Serve cache hits directly and batch only the missing prompts."""
+        keys = [self._key(prompt, kwargs) for prompt in prompts]
+        responses = [self._load(key) for key in keys]
+        missing = [i for i, response in enumerate(responses) if response is None]
+        
+        if missing:
+            generated = self.provider.generate_batch([prompts[i] for i in missing], **kwargs)
+            stored = False
+            for i, response in zip(missing, generated):
+                stored = self._store(keys[i], response) or stored
+                responses[i] = response
+            # One directory scan for the whole batch
+            if stored:
+                self._trim()
+        
+        return responses
+    
+    def generate_stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        """Replay a cached response, or stream a new one and cache it once complete.
+        
+        A stream that raises, or that the caller abandons, is never stored.
+        """
+        key = self._key(prompt, kwargs)
+        cached = self._load(key)
+        if cached is not None:
+            yield cached.content
+            return
+        
+        chunks = []
+        for chunk in self.provider.generate_stream(prompt, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        # Only reached once the provider has finished the response
+        if self._store(key, ModelResponse(content="".join(chunks), metadata={})):
+            self._trim()
+    
+    def is_available(self) -> bool:
+        """Check if the wrapped provider is available."""
+        return self.provider.is_available()
\ No newline at end of file
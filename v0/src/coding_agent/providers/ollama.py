@@ -1,7 +1,8 @@
 """Ollama model provider."""
 
+import json
 import requests
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional
 from .base import ModelProvider
 from ..types import ModelResponse
 
@@ -52,6 +53,43 @@ class OllamaProvider(ModelProvider):
                 metadata={"error": str(e)}
             )
     
+    def generate_stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        """Stream a response from Ollama chunk by chunk.
+        
+        Raises RuntimeError if the connection fails or the stream ends before
+        Ollama reports it done, so partial text is never taken as complete.
+        """
+        timeout = kwargs.pop("timeout", (10, 300))
+        done = False
+        try:
+            with requests.post(
+                f"{self.base_url}/api/generate",
+                json={
+                    "model": self.model,
+                    "prompt": prompt,
+                    "stream": True,
+                    **kwargs
+                },
+                timeout=timeout,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                # Ollama streams one JSON object per line
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    chunk = data.get("response", "")
+                    if chunk:
+                        yield chunk
+                    if data.get("done"):
+                        done = True
+                        break
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise RuntimeError(f"Ollama stream failed before completion: {e}") from e
+        if not done:
+            raise RuntimeError("Ollama stream ended before completion")
+    
     def is_available(self) -> bool:
         """Check if Ollama is available."""
         try:
@@ -2,17 +2,87 @@
 
 import os
 import subprocess
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, List, Optional, Tuple
 from .base import Tool
+from .code_gathering import CodeGatherer, SOURCE_EXTENSIONS, SUMMARY_EXTENSIONS
 from ..types import ToolResult
 from ..providers.base import ModelProvider
 
 
+FOCUS_INSTRUCTIONS = {
+    "overview": "Provide a comprehensive overview including purpose, structure, and key components.",
+    "architecture": "Focus on the architectural patterns, design decisions, and system structure.",
+    "functionality": "Emphasize what the code does, its main features, and user-facing functionality.",
+    "dependencies": "Highlight external dependencies, libraries used, and integration points."
+}
+
+# Per-file prompt used to condense each file before the final summary/analysis
+FILE_NOTES_PROMPT = """Summarize the following file as a few concise bullet points. These notes will be combined with notes on other files into a single report.
+
+FOCUS: {instruction}
+
+{section}
+
+Only describe this file."""
+
+ANALYSIS_INSTRUCTIONS = {
+    "complexity": "Focus on code complexity, cyclomatic complexity, nesting levels, function sizes, and maintainability concerns.",
+    "patterns": "Identify design patterns, architectural patterns, code smells, anti-patterns, and coding conventions used.",
+    "issues": "Look for potential bugs, security vulnerabilities, performance issues, and code quality problems.",
+    "metrics": "Provide detailed metrics including lines of code, complexity scores, test coverage insights, and quantitative analysis.",
+    "all": "Provide comprehensive analysis covering complexity, patterns, potential issues, and key metrics."
+}
+
+
+def _condense_sections(provider: ModelProvider, sections: List[str], instruction: str,
+                       extract: Callable[[str], str]) -> List[str]:
+    """Map step for multi-file targets: turn each file section into short notes.
+    
+    All per-file prompts go to the provider as one batch so they run
+    concurrently; the caller then reduces the notes with a single prompt.
+    """
+    prompts = [FILE_NOTES_PROMPT.format(instruction=instruction, section=section) for section in sections]
+    generate_batch = getattr(provider, "generate_batch", None)
+    if generate_batch:
+        responses = generate_batch(prompts)
+    else:
+        responses = [provider.generate(prompt) for prompt in prompts]
+    
+    notes = []
+    for section, response in zip(sections, responses):
+        text = response.content.strip()
+        if not text:
+            # Fall back to the raw excerpt if the model returned nothing
+            notes.append(section)
+            continue
+        header = section.split("\n", 1)[0]
+        notes.append(f"{header}\n{extract(text)}\n")
+    return notes
+
+
+def _generate_text(provider: ModelProvider, prompt: str, on_chunk: Optional[Callable[[str], None]] = None) -> str:
+    """Run a prompt, passing response chunks to on_chunk as they stream in."""
+    if on_chunk is None or not hasattr(provider, "generate_stream"):
+        return provider.generate(prompt).content
+    
+    chunks = []
+    for chunk in provider.generate_stream(prompt):
+        on_chunk(chunk)
+        chunks.append(chunk)
+    return "".join(chunks)
+
+
 class SummarizeCodeTool(Tool):
     """Tool for generating LLM-powered summaries of codebases or files."""
     
-    def __init__(self, model_provider: Optional[ModelProvider] = None):
+    def __init__(self, model_provider: Optional[ModelProvider] = None,
+                 stream_callback: Optional[Callable[[str], None]] = None):
         self.model_provider = model_provider
+        # Receives the final response as it streams in, e.g. to show progress
+        self.stream_callback = stream_callback
+        self._gatherer = CodeGatherer(SUMMARY_EXTENSIONS)
+        # Final LLM output per (target, focus), stored with the target signature it was built from
+        self._result_cache: Dict[Tuple[str, str], Tuple[str, str]] = {}
     
     @property
     def name(self) -> str:
@@ -47,31 +117,45 @@ class SummarizeCodeTool(Tool):
     def execute(self, **parameters) -> ToolResult:
         target = parameters.get("target", "codebase")
         focus = parameters.get("focus", "overview")
+        self._gatherer.reset(target)
         
         try:
+            # Reuse the previous summary if nothing under the target changed since
+            signature = self._gatherer.target_signature('.' if target == "codebase" else target)
+            cached = self._result_cache.get((target, focus))
+            if signature is not None and cached and cached[0] == signature:
+                return ToolResult(success=True, output=cached[1], action_description=f"LLM summarized {target} with focus on {focus} (cached)")
+            
             # Check if LLM is available
             if not self.model_provider or not self.model_provider.is_available():
                 return ToolResult(success=False, output=None, error="LLM provider not available for intelligent code analysis")
             
-            # Gather code content
+            # Gather code content, one section per file
             if target == "codebase":
-                content = self._gather_codebase_content()
+                sections = self._gatherer.gather_codebase()
             elif os.path.isfile(target):
-                content = self._gather_file_content(target)
+                sections = [self._gatherer.gather_file(target)]
             elif os.path.isdir(target):
-                content = self._gather_directory_content(target)
+                sections = self._gatherer.gather_directory(target)
             else:
                 return ToolResult(success=False, output=None, error=f"Target '{target}' not found or not accessible.")
             
+            # Condense multi-file targets per file in one batch, then reduce
+            if len(sections) > 1:
+                instruction = FOCUS_INSTRUCTIONS.get(focus, FOCUS_INSTRUCTIONS["overview"])
+                sections = _condense_sections(self.model_provider, sections, instruction, self._extract_final_answer)
+            
             # Generate LLM summary
-            prompt = self._build_summary_prompt(content, target, focus)
-            response = self.model_provider.generate(prompt)
+            prompt = self._build_summary_prompt("\n".join(sections), target, focus)
+            response_text = _generate_text(self.model_provider, prompt, self.stream_callback)
             
-            if not response.content.strip():
+            if not response_text.strip():
                 return ToolResult(success=False, output=None, error="LLM returned empty response")
             
             # Extract the actual answer (content outside thinking tokens)
-            final_output = self._extract_final_answer(response.content.strip())
+            final_output = self._extract_final_answer(response_text.strip())
+            if signature is not None:
+                self._result_cache[(target, focus)] = (signature, final_output)
             
             return ToolResult(success=True, output=final_output, action_description=f"LLM summarized {target} with focus on {focus}")
         except Exception as e:
@@ -99,100 +183,9 @@ class SummarizeCodeTool(Tool):
         
         return final_text
     
-    def _gather_codebase_content(self) -> str:
-        """Gather key codebase files for LLM analysis."""
-        content_parts = []
-        
-        # Add project overview files
-        overview_files = ['README.md', 'package.json', 'requirements.txt', 'setup.py', 'Cargo.toml']
-        for file in overview_files:
-            if os.path.exists(file):
-                try:
-                    with open(file, 'r', encoding='utf-8') as f:
-                        content = f.read()[:2000]  # Limit size
-                        content_parts.append(f"=== {file} ===\n{content}\n")
-                except:
-                    continue
-        
-        # Add key source files (limit to prevent context overflow)
-        source_files = []
-        for root, dirs, files in os.walk('.'):
-            # Skip hidden and build directories
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['__pycache__', 'node_modules', 'target', 'build']]
-            
-            for file in files:
-                if file.endswith(('.py', '.js', '.ts', '.rs', '.go', '.java', '.cpp', '.h')):
-                    file_path = os.path.join(root, file)
-                    source_files.append(file_path)
-        
-        # Sort by relevance (main files first, then by name)
-        source_files.sort(key=lambda x: (
-            0 if 'main' in os.path.basename(x).lower() else
-            1 if 'app' in os.path.basename(x).lower() else
-            2 if 'index' in os.path.basename(x).lower() else 3,
-            x
-        ))
-        
-        # Add top source files (limit to prevent context overflow)
-        for file_path in source_files[:10]:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()[:1500]  # Limit size per file
-                    content_parts.append(f"=== {file_path} ===\n{content}\n")
-            except:
-                continue
-        
-        return "\n".join(content_parts)
-    
-    def _gather_file_content(self, file_path: str) -> str:
-        """Gather content from a specific file for LLM analysis."""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            return f"=== {file_path} ===\n{content}"
-        except Exception as e:
-            return f"=== {file_path} ===\nError reading file: {e}"
-    
-    def _gather_directory_content(self, dir_path: str) -> str:
-        """Gather content from a directory for LLM analysis."""
-        content_parts = []
-        
-        try:
-            # Gather relevant files from the directory
-            source_files = []
-            for root, dirs, files in os.walk(dir_path):
-                # Skip hidden and build directories
-                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['__pycache__', 'node_modules', 'target', 'build']]
-                
-                for file in files:
-                    if file.endswith(('.py', '.js', '.ts', '.rs', '.go', '.java', '.cpp', '.h', '.md')):
-                        file_path = os.path.join(root, file)
-                        source_files.append(file_path)
-            
-            # Add files up to a reasonable limit
-            for file_path in sorted(source_files)[:8]:
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()[:2000]  # Limit size per file
-                        content_parts.append(f"=== {file_path} ===\n{content}\n")
-                except:
-                    continue
-            
-        except Exception as e:
-            content_parts.append(f"Error reading directory {dir_path}: {e}")
-        
-        return "\n".join(content_parts)
-    
     def _build_summary_prompt(self, content: str, target: str, focus: str) -> str:
         """Build a prompt for LLM code summarization."""
-        focus_instructions = {
-            "overview": "Provide a comprehensive overview including purpose, structure, and key components.",
-            "architecture": "Focus on the architectural patterns, design decisions, and system structure.",
-            "functionality": "Emphasize what the code does, its main features, and user-facing functionality.",
-            "dependencies": "Highlight external dependencies, libraries used, and integration points."
-        }
-        
-        focus_instruction = focus_instructions.get(focus, focus_instructions["overview"])
+        focus_instruction = FOCUS_INSTRUCTIONS.get(focus, FOCUS_INSTRUCTIONS["overview"])
         
         return f"""Please analyze the following code and provide a clear, well-structured summary.
 
@@ -215,8 +208,14 @@ Keep the summary concise but informative, suitable for developers who need to un
 class AnalyzeCodeTool(Tool):
     """Tool for detailed LLM-powered code analysis and structure inspection."""
     
-    def __init__(self, model_provider: Optional[ModelProvider] = None):
+    def __init__(self, model_provider: Optional[ModelProvider] = None,
+                 stream_callback: Optional[Callable[[str], None]] = None):
         self.model_provider = model_provider
+        # Receives the final response as it streams in, e.g. to show progress
+        self.stream_callback = stream_callback
+        self._gatherer = CodeGatherer(SOURCE_EXTENSIONS)
+        # Final LLM output per (target, focus), stored with the target signature it was built from
+        self._result_cache: Dict[Tuple[str, str], Tuple[str, str]] = {}
     
     @property
     def name(self) -> str:
@@ -251,8 +250,15 @@ class AnalyzeCodeTool(Tool):
     def execute(self, **parameters) -> ToolResult:
         target = parameters.get("target", ".")
         analysis_type = parameters.get("analysis_type", "all")
+        self._gatherer.reset(target)
         
         try:
+            # Reuse the previous analysis if nothing under the target changed since
+            signature = self._gatherer.target_signature(target)
+            cached = self._result_cache.get((target, analysis_type))
+            if signature is not None and cached and cached[0] == signature:
+                return ToolResult(success=True, output=cached[1], action_description=f"LLM analyzed {target} ({analysis_type}, cached)")
+            
             # Check if LLM is available
             if not self.model_provider or not self.model_provider.is_available():
                 return ToolResult(success=False, output=None, error="LLM provider not available for intelligent code analysis")
@@ -261,21 +267,28 @@ class AnalyzeCodeTool(Tool):
             if not os.path.exists(target):
                 return ToolResult(success=False, output=None, error=f"Target '{target}' not found.")
             
-            # Gather code content
+            # Gather code content, one section per file
             if os.path.isfile(target):
-                content = self._gather_file_content(target)
+                sections = [self._gatherer.gather_file(target)]
             else:
-                content = self._gather_directory_content(target)
+                sections = self._gatherer.gather_directory(target)
+            
+            # Condense multi-file targets per file in one batch, then reduce
+            if len(sections) > 1:
+                instruction = ANALYSIS_INSTRUCTIONS.get(analysis_type, ANALYSIS_INSTRUCTIONS["all"])
+                sections = _condense_sections(self.model_provider, sections, instruction, self._extract_final_answer)
             
             # Generate LLM analysis
-            prompt = self._build_analysis_prompt(content, target, analysis_type)
-            response = self.model_provider.generate(prompt)
+            prompt = self._build_analysis_prompt("\n".join(sections), target, analysis_type)
+            response_text = _generate_text(self.model_provider, prompt, self.stream_callback)
             
-            if not response.content.strip():
+            if not response_text.strip():
                 return ToolResult(success=False, output=None, error="LLM returned empty response")
             
             # Extract the actual answer (content outside thinking tokens)
-            final_output = self._extract_final_answer(response.content.strip())
+            final_output = self._extract_final_answer(response_text.strip())
+            if signature is not None:
+                self._result_cache[(target, analysis_type)] = (signature, final_output)
             
             return ToolResult(success=True, output=final_output, action_description=f"LLM analyzed {target} ({analysis_type})")
         except Exception as e:
@@ -303,56 +316,9 @@ class AnalyzeCodeTool(Tool):
         
         return final_text
     
-    def _gather_file_content(self, file_path: str) -> str:
-        """Gather content from a specific file for LLM analysis."""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            return f"=== {file_path} ===\n{content}"
-        except Exception as e:
-            return f"=== {file_path} ===\nError reading file: {e}"
-    
-    def _gather_directory_content(self, dir_path: str) -> str:
-        """Gather content from a directory for LLM analysis."""
-        content_parts = []
-        
-        try:
-            # Gather relevant files from the directory
-            source_files = []
-            for root, dirs, files in os.walk(dir_path):
-                # Skip hidden and build directories
-                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['__pycache__', 'node_modules', 'target', 'build']]
-                
-                for file in files:
-                    if file.endswith(('.py', '.js', '.ts', '.rs', '.go', '.java', '.cpp', '.h')):
-                        file_path = os.path.join(root, file)
-                        source_files.append(file_path)
-            
-            # Add files up to a reasonable limit
-            for file_path in sorted(source_files)[:8]:
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()[:2000]  # Limit size per file
-                        content_parts.append(f"=== {file_path} ===\n{content}\n")
-                except:
-                    continue
-            
-        except Exception as e:
-            content_parts.append(f"Error reading directory {dir_path}: {e}")
-        
-        return "\n".join(content_parts)
-    
     def _build_analysis_prompt(self, content: str, target: str, analysis_type: str) -> str:
         """Build a prompt for LLM code analysis."""
-        analysis_instructions = {
-            "complexity": "Focus on code complexity, cyclomatic complexity, nesting levels, function sizes, and maintainability concerns.",
-            "patterns": "Identify design patterns, architectural patterns, code smells, anti-patterns, and coding conventions used.",
-            "issues": "Look for potential bugs, security vulnerabilities, performance issues, and code quality problems.",
-            "metrics": "Provide detailed metrics including lines of code, complexity scores, test coverage insights, and quantitative analysis.",
-            "all": "Provide comprehensive analysis covering complexity, patterns, potential issues, and key metrics."
-        }
-        
-        analysis_instruction = analysis_instructions.get(analysis_type, analysis_instructions["all"])
+        analysis_instruction = ANALYSIS_INSTRUCTIONS.get(analysis_type, ANALYSIS_INSTRUCTIONS["all"])
         
         return f"""Please perform a detailed code analysis of the following code.
 
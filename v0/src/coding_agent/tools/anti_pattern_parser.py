@@ -1,12 +1,198 @@
 """Anti-pattern parser tool for detecting code patterns in files."""
 
+import os
 import re
+import mmap
 import json
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
 from .base import Tool
+from .file_walk import SKIP_DIRS, walk_tree
+from .process_pool import map_in_processes
 from ..types import ToolResult
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+# File extensions scanned for anti-patterns (a tuple for the str.endswith fast path)
+CODE_EXTENSIONS = ('.py', '.js', '.ts', '.jsx', '.tsx', '.go', '.java', '.c', '.cpp', '.h', '.hpp', '.cs', '.php', '.rb', '.rs', '.kt', '.swift')
+
+# Scans with at least this many files are spread over worker processes
+PARALLEL_SCAN_MIN_FILES = 512
+# Files handed to a worker per task
+SCAN_BATCH_SIZE = 64
+# Files at least this large are streamed in line-aligned blocks instead of mapped whole
+STREAM_SCAN_MIN_SIZE = 8 << 20
+STREAM_BLOCK_SIZE = 1 << 20
+
+
+def _iter_code_files(root: str, extensions: Tuple[str, ...] = CODE_EXTENSIONS,
+                     ignore_dirs: frozenset = SKIP_DIRS) -> Iterator[str]:
+    """Lazily yield code files under root, pruning ignored and hidden directories."""
+    prefix_len = len(os.curdir + os.sep) if root == os.curdir else 0
+    for entry in walk_tree(root, ignore_dirs):
+        if entry.name.endswith(extensions):
+            yield entry.path[prefix_len:]
+
+
+def _lower_text(data: bytes) -> bytes:
+    """Lowercase UTF-8 bytes using Unicode rather than ASCII-only case mapping."""
+    return data.decode('utf-8', errors='ignore').lower().encode('utf-8')
+
+
+def _count_newlines(data, start: int, end: int) -> int:
+    """Count the newlines in data[start:end], where data is bytes or an mmap.
+    
+    mmap has no count(), so it is sliced in bounded blocks rather than copied whole.
+    """
+    if isinstance(data, bytes):
+        return data.count(b'\n', start, end)
+    if end - start <= STREAM_BLOCK_SIZE:
+        return data[start:end].count(b'\n')
+    return sum(data[i:min(i + STREAM_BLOCK_SIZE, end)].count(b'\n') for i in range(start, end, STREAM_BLOCK_SIZE))
+
+
+def _find_lines(data, needle: bytes) -> List[int]:
+    """Return the 1-based numbers of the lines containing needle (once per line)."""
+    line_numbers = []
+    line_no = 1
+    line_start = 0
+    pos = data.find(needle)
+    while pos != -1:
+        line_no += _count_newlines(data, line_start, pos)
+        line_numbers.append(line_no)
+        
+        # Resume at the start of the next line
+        line_end = data.find(b'\n', pos + len(needle))
+        if line_end == -1:
+            break
+        line_start = line_end + 1
+        line_no += 1
+        pos = data.find(needle, line_start)
+    return line_numbers
+
+
+class _FileScan:
+    """Per-file state shared by every rule: case-folded views and pattern hits."""
+    
+    def __init__(self, content):
+        self.content = content
+        self._views: Dict[Callable[[bytes], bytes], bytes] = {}
+        self._present: Dict[Tuple, bool] = {}
+        self._hits: Dict[Tuple, Optional[List[int]]] = {}
+    
+    def view(self, lower: Optional[Callable[[bytes], bytes]]):
+        """Return the content lowered with lower, or the content itself if lower is None.
+        
+        A mapped file is searched in place; only case-insensitive rules build a
+        lowered copy.
+        """
+        if lower is None:
+            return self.content
+        view = self._views.get(lower)
+        if view is None:
+            view = self._views[lower] = lower(self.content[:])
+        return view
+    
+    def contains(self, lower: Optional[Callable[[bytes], bytes]], needle: bytes) -> bool:
+        """Return whether needle occurs in the content under the given folding."""
+        key = (lower, needle)
+        present = self._present.get(key)
+        if present is None:
+            present = self._present[key] = self.view(lower).find(needle) != -1
+        return present
+    
+    def lines(self, lower: Optional[Callable[[bytes], bytes]], needle: bytes) -> Optional[List[int]]:
+        """Return the line numbers containing needle, or None if it does not occur."""
+        key = (lower, needle)
+        if key in self._hits:
+            return self._hits[key]
+        
+        search_content = self.view(lower)
+        if not self.contains(lower, needle):
+            line_numbers = None
+        elif b'\n' in needle:
+            # A pattern spanning lines never matches within a single line
+            line_numbers = []
+        else:
+            line_numbers = _find_lines(search_content, needle)
+        self._hits[key] = line_numbers
+        return line_numbers
+
+
+class _StreamedScan:
+    """_FileScan equivalent for large files, read in line-aligned blocks.
+    
+    Only valid when no needle is empty or spans lines, so a match can only
+    straddle two blocks inside one long line; memory stays bounded by the
+    block size.
+    """
+    
+    def __init__(self, f, keys):
+        self._hits: Dict[Tuple, List[int]] = {key: [] for key in keys}
+        # Bytes of an unbroken line carried over so a match can finish in the next block
+        overlap = max((len(needle) for _, needle in keys), default=1) - 1
+        line_offset = 0
+        remainder = b''
+        while True:
+            block = f.read(STREAM_BLOCK_SIZE)
+            if block:
+                # Hold back the trailing partial line for the next block
+                block = remainder + block
+                cut = block.rfind(b'\n') + 1
+                if not cut:
+                    # No line break at all (e.g. minified code): scan the block
+                    # and keep only its tail rather than growing the remainder
+                    cut = max(len(block) - overlap, 0)
+                    if not cut:
+                        remainder = block
+                        continue
+                    chunk, remainder = block, block[cut:]
+                else:
+                    chunk, remainder = block[:cut], block[cut:]
+            elif remainder:
+                chunk, remainder = remainder, b''
+            else:
+                break
+            
+            views = {None: chunk}
+            for (lower, needle), line_numbers in self._hits.items():
+                view = views.get(lower)
+                if view is None:
+                    view = views[lower] = lower(chunk)
+                found = _find_lines(view, needle)
+                # A line spanning several blocks is reported once
+                if found and line_numbers and line_numbers[-1] == line_offset + found[0]:
+                    del found[0]
+                line_numbers.extend(line_offset + n for n in found)
+            line_offset += chunk.count(b'\n')
+    
+    def contains(self, lower: Optional[Callable[[bytes], bytes]], needle: bytes) -> bool:
+        """Return whether needle occurs in the content under the given folding."""
+        return bool(self._hits[(lower, needle)])
+    
+    def lines(self, lower: Optional[Callable[[bytes], bytes]], needle: bytes) -> Optional[List[int]]:
+        """Return the line numbers containing needle, or None if it does not occur."""
+        return self._hits[(lower, needle)] or None
+
+
+def _compile_presence_check(lower: Optional[Callable[[bytes], bytes]], needles: List[bytes]) -> Callable:
+    """Generate a rule's all-patterns-present check with its needles inlined.
+    
+    The result is a short-circuiting `and` chain of scan.contains() calls with
+    the folding and byte literals baked in, so no per-call loop or branching
+    on case sensitivity remains.
+    """
+    terms = " and ".join(f"contains(lower, {needle!r})" for needle in needles) or "True"
+    source = f"def all_present(scan):\n    contains = scan.contains\n    return {terms}\n"
+    namespace = {'lower': lower}
+    exec(compile(source, '<anti-pattern rule>', 'exec'), namespace)
+    return namespace['all_present']
+
 
 class AntiPatternRule:
     """Represents a single anti-pattern detection rule."""
@@ -17,45 +203,138 @@ class AntiPatternRule:
         self.description = description
         self.case_sensitive = case_sensitive
         
-    def check_file(self, file_path: str, content: str) -> List[Dict[str, Any]]:
-        """Check if file content matches this rule's patterns."""
+        # Encode patterns once; bytes.lower() only folds ASCII, so fall back to
+        # Unicode lowering when a case-insensitive pattern has non-ASCII letters
+        if case_sensitive:
+            self._needles = [pattern.encode('utf-8') for pattern in patterns]
+            self._lower = None
+        else:
+            self._needles = [pattern.lower().encode('utf-8') for pattern in patterns]
+            unicode_cased = any(not char.isascii() and char.lower() != char.upper()
+                                for pattern in patterns for char in pattern)
+            self._lower = _lower_text if unicode_cased else bytes.lower
+        
+        # Longer patterns are usually rarer, so checking them first finds a miss sooner
+        check_order = sorted(dict.fromkeys(self._needles), key=len, reverse=True)
+        self._all_present = _compile_presence_check(self._lower, check_order)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the rule's configuration, as stored in the config file."""
+        return {
+            "name": self.name,
+            "patterns": self.patterns,
+            "description": self.description,
+            "case_sensitive": self.case_sensitive
+        }
+        
+    def check_file(self, file_path: str, content, scan: Optional['_FileScan'] = None) -> List[Dict[str, Any]]:
+        """Check if file content (bytes or a read-only mmap) matches this rule's patterns.
+        
+        Pass the same scan to every rule checking a file so its lowered content
+        and pattern hits are computed once for all of them.
+        """
         issues = []
+        if scan is None:
+            scan = _FileScan(content)
         
-        # Convert content to lowercase if case insensitive
-        search_content = content if self.case_sensitive else content.lower()
+        # The rule only fires if all patterns appear in the same file, so stop
+        # at the first missing one before collecting any line numbers
+        if not self._all_present(scan):
+            return issues
         
-        # Check if all patterns appear in the same file
-        pattern_matches = []
-        for pattern in self.patterns:
-            search_pattern = pattern if self.case_sensitive else pattern.lower()
-            if search_pattern in search_content:
-                # Find all line numbers where pattern appears
-                lines = content.split('\n')
-                line_numbers = []
-                for i, line in enumerate(lines, 1):
-                    line_to_search = line if self.case_sensitive else line.lower()
-                    if search_pattern in line_to_search:
-                        line_numbers.append(i)
-                pattern_matches.append({
-                    'pattern': pattern,
-                    'lines': line_numbers
-                })
+        pattern_matches = [
+            {
+                'pattern': pattern,
+                'lines': scan.lines(self._lower, needle)
+            }
+            for pattern, needle in zip(self.patterns, self._needles)
+        ]
         
-        # If all patterns were found, report the issue
-        if len(pattern_matches) == len(self.patterns):
-            issues.append({
-                'rule': self.name,
-                'description': self.description,
-                'file': file_path,
-                'patterns_found': pattern_matches
-            })
+        # All patterns were found, report the issue
+        issues.append({
+            'rule': self.name,
+            'description': self.description,
+            'file': file_path,
+            'patterns_found': pattern_matches
+        })
         
         return issues
 
 
+def _scan_file(file_path: str, rules: List[AntiPatternRule]) -> List[Dict[str, Any]]:
+    """Check one file against every rule."""
+    all_issues = []
+    try:
+        # Map the file instead of copying it into a str; rules search the bytes directly
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return all_issues
+            
+            if size >= STREAM_SCAN_MIN_SIZE:
+                keys = {(rule._lower, needle) for rule in rules for needle in rule._needles}
+                if all(needle and b'\n' not in needle for _, needle in keys):
+                    # Large generated/minified files: stream instead of copying them whole
+                    scan = _StreamedScan(f, keys)
+                    for rule in rules:
+                        all_issues.extend(rule.check_file(file_path, None, scan))
+                    return all_issues
+            
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                # Lowered content and patterns shared between rules are computed once per file
+                scan = _FileScan(content)
+                for rule in rules:
+                    issues = rule.check_file(file_path, content, scan)
+                    all_issues.extend(issues)
+    except Exception as e:
+        print(f"Warning: Could not scan {file_path}: {e}")
+    return all_issues
+
+
+# Rules rebuilt once per worker process by _init_scan_worker
+_worker_rules: List[AntiPatternRule] = []
+
+
+def _init_scan_worker(rule_configs: List[Dict[str, Any]]):
+    """Process pool initializer: build the rules once instead of per task."""
+    global _worker_rules
+    _worker_rules = [AntiPatternRule(**config) for config in rule_configs]
+
+
+def _scan_batch(file_paths: List[str]) -> List[Dict[str, Any]]:
+    """Worker task: scan a batch of files with this process's rules."""
+    all_issues = []
+    for file_path in file_paths:
+        all_issues.extend(_scan_file(file_path, _worker_rules))
+    return all_issues
+
+
+def _read_config(path) -> Dict[str, Any]:
+    """Parse a rules config file, using orjson when it is installed."""
+    if HAS_ORJSON:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_config(path, config: Dict[str, Any]):
+    """Write a rules config file (2-space indented), using orjson when it is installed."""
+    if HAS_ORJSON:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, 'w') as f:
+        json.dump(config, f, indent=2)
+
+
 class AntiPatternParser(Tool):
     """Tool for detecting custom anti-patterns in code."""
     
+    # Parsed rules per absolute config path, with the (st_mtime_ns, st_size) they
+    # were read at; one entry per path, shared by all instances
+    _rules_cache: Dict[str, Tuple[int, int, List[AntiPatternRule]]] = {}
+    
     def __init__(self, config_file: str = ".anti_patterns.json"):
         self.config_file = config_file
         self.rules: List[AntiPatternRule] = []
@@ -115,21 +394,28 @@ class AntiPatternParser(Tool):
         if not config_path.exists():
             # Create empty config file
             default_config = {"rules": []}
-            with open(config_path, 'w') as f:
-                json.dump(default_config, f, indent=2)
+            _write_config(config_path, default_config)
         
         try:
-            with open(config_path, 'r') as f:
-                config = json.load(f)
-                self.rules = [
-                    AntiPatternRule(
-                        name=rule['name'],
-                        patterns=rule['patterns'],
-                        description=rule.get('description', ''),
-                        case_sensitive=rule.get('case_sensitive', False)
-                    )
-                    for rule in config.get('rules', [])
-                ]
+            # Reuse rules parsed by an earlier instance while the file is unchanged
+            cache_key = os.path.abspath(config_path)
+            st = os.stat(config_path)
+            cached = self._rules_cache.get(cache_key)
+            if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+                self.rules = list(cached[2])
+                return
+            
+            config = _read_config(config_path)
+            self.rules = [
+                AntiPatternRule(
+                    name=rule['name'],
+                    patterns=rule['patterns'],
+                    description=rule.get('description', ''),
+                    case_sensitive=rule.get('case_sensitive', False)
+                )
+                for rule in config.get('rules', [])
+            ]
+            self._rules_cache[cache_key] = (st.st_mtime_ns, st.st_size, list(self.rules))
         except Exception as e:
             print(f"Warning: Could not load anti-pattern rules: {e}")
             self.rules = []
@@ -137,19 +423,12 @@ class AntiPatternParser(Tool):
     def _save_rules(self):
         """Save rules to config file."""
         config = {
-            "rules": [
-                {
-                    "name": rule.name,
-                    "patterns": rule.patterns,
-                    "description": rule.description,
-                    "case_sensitive": rule.case_sensitive
-                }
-                for rule in self.rules
-            ]
+            "rules": [rule.to_dict() for rule in self.rules]
         }
         
-        with open(self.config_file, 'w') as f:
-            json.dump(config, f, indent=2)
+        _write_config(self.config_file, config)
+        # The rewrite may land within the cached entry's timestamp tick
+        self._rules_cache.pop(os.path.abspath(self.config_file), None)
     
     def _scan_path(self, path: str) -> List[Dict[str, Any]]:
         """Scan path for anti-patterns."""
@@ -159,31 +438,41 @@ class AntiPatternParser(Tool):
         if not scan_path.exists():
             return []
         
-        # Define file extensions to scan
-        code_extensions = {'.py', '.js', '.ts', '.jsx', '.tsx', '.go', '.java', '.c', '.cpp', '.h', '.hpp', '.cs', '.php', '.rb', '.rs', '.kt', '.swift'}
-        
         if scan_path.is_file():
-            files_to_scan = [scan_path]
+            files_to_scan = [str(scan_path)]
         else:
-            files_to_scan = [
-                f for f in scan_path.rglob('*') 
-                if f.is_file() and f.suffix in code_extensions
-                and not any(ignore in f.parts for ignore in {'.git', '__pycache__', 'node_modules'})
-            ]
+            files_to_scan = list(_iter_code_files(path))
+        
+        # Large scans are CPU-bound over independent files, so use every core
+        issues = self._scan_files_parallel(files_to_scan)
+        if issues is not None:
+            return issues
         
         for file_path in files_to_scan:
-            try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                
-                for rule in self.rules:
-                    issues = rule.check_file(str(file_path), content)
-                    all_issues.extend(issues)
-            except Exception as e:
-                print(f"Warning: Could not scan {file_path}: {e}")
+            all_issues.extend(_scan_file(file_path, self.rules))
         
         return all_issues
     
+    def _scan_files_parallel(self, files_to_scan: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """Scan files in batches across worker processes, keeping file order.
+        
+        Returns None if the scan is too small to parallelize or no pool could start.
+        """
+        if len(files_to_scan) < PARALLEL_SCAN_MIN_FILES:
+            return None
+        
+        batches = [files_to_scan[i:i + SCAN_BATCH_SIZE] for i in range(0, len(files_to_scan), SCAN_BATCH_SIZE)]
+        rule_configs = [rule.to_dict() for rule in self.rules]
+        results = map_in_processes(_scan_batch, batches, min_items=1, chunksize=1,
+                                   initializer=_init_scan_worker, initargs=(rule_configs,))
+        if results is None:
+            return None
+        
+        all_issues = []
+        for issues in results:
+            all_issues.extend(issues)
+        return all_issues
+    
     def execute(self, **parameters) -> ToolResult:
         """Execute the anti-pattern parser tool."""
         action = parameters.get('action')
@@ -3,17 +3,85 @@
 import os
 import re
 import ast
+import io
 import json
+import heapq
 from typing import Dict, Any, List, Set, Optional, Tuple
 from pathlib import Path
 from collections import defaultdict, Counter
+from concurrent.futures import ThreadPoolExecutor
 from .base import Tool
+from .file_walk import walk_tree
 from ..types import ToolResult
 
 
+# Primary language for each extension counted during auto-detection
+EXTENSION_LANGUAGES = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.ts': 'typescript',
+    '.java': 'java',
+    '.cpp': 'cpp',
+    '.c': 'c',
+    '.go': 'go',
+    '.rs': 'rust'
+}
+
+# Source file extensions collected for each language
+LANGUAGE_EXTENSIONS = {
+    'python': frozenset({'.py'}),
+    'javascript': frozenset({'.js'}),
+    'typescript': frozenset({'.ts'}),
+    'java': frozenset({'.java'}),
+    'cpp': frozenset({'.cpp', '.cc', '.cxx'}),
+    'c': frozenset({'.c', '.h'}),
+    'go': frozenset({'.go'}),
+    'rust': frozenset({'.rs'})
+}
+
+# Design pattern indicators, one compiled alternation per pattern so each
+# file is searched once per pattern instead of once per indicator
+DESIGN_PATTERN_INDICATORS = {
+    name: re.compile('|'.join(f'(?:{indicator})' for indicator in indicators), re.IGNORECASE)
+    for name, indicators in {
+        "Singleton": [r'class\s+\w+.*:\s*\n.*_instance\s*=', r'getInstance\(\)'],
+        "Factory": [r'create\w*\(', r'Factory\w*\('],
+        "Observer": [r'addObserver', r'notifyObservers', r'addEventListener'],
+        "Strategy": [r'Strategy\w*', r'\w*Strategy'],
+        "Decorator": [r'@\w+', r'decorator'],
+    }.items()
+}
+
+
+def _count_lines(file_path: str) -> Optional[Tuple[int, int]]:
+    """Count total and non-empty lines in a single streamed pass; None if unreadable.
+    
+    Text mode keeps the counts readlines() gave: universal newlines (a lone
+    CR ends a line), Unicode whitespace for blank lines, and files that are
+    not valid UTF-8 skipped.
+    """
+    line_count = 0
+    non_empty_lines = 0
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line_count += 1
+                if line.strip():
+                    non_empty_lines += 1
+    except (OSError, UnicodeDecodeError):
+        return None
+    return line_count, non_empty_lines
+
+
 class ArchitectureAnalysisTool(Tool):
     """Tool for analyzing code architecture, dependencies, and structural patterns."""
     
+    def __init__(self):
+        # Parsed Python modules keyed by path, stored with the mtime they were parsed at
+        self._ast_cache: Dict[str, Tuple[float, Optional[ast.AST]]] = {}
+        # Byte sizes recorded while collecting source files
+        self._file_sizes: Dict[str, int] = {}
+    
     @property
     def name(self) -> str:
         return "analyze_architecture"
@@ -137,63 +205,39 @@ class ArchitectureAnalysisTool(Tool):
         """Auto-detect the primary programming language."""
         extensions = Counter()
         
-        for root, dirs, files in os.walk(target):
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in {'node_modules', '__pycache__', 'build', 'dist'}]
-            
-            for file in files:
-                ext = Path(file).suffix.lower()
-                if ext in {'.py', '.js', '.ts', '.java', '.cpp', '.c', '.go', '.rs'}:
-                    extensions[ext] += 1
+        for entry in walk_tree(target):
+            ext = os.path.splitext(entry.name)[1].lower()
+            if ext in EXTENSION_LANGUAGES:
+                extensions[ext] += 1
         
         if not extensions:
             return "python"  # Default fallback
         
-        # Map extensions to languages
-        ext_to_lang = {
-            '.py': 'python',
-            '.js': 'javascript', 
-            '.ts': 'typescript',
-            '.java': 'java',
-            '.cpp': 'cpp',
-            '.c': 'c',
-            '.go': 'go',
-            '.rs': 'rust'
-        }
-        
         most_common_ext = extensions.most_common(1)[0][0]
-        return ext_to_lang.get(most_common_ext, 'python')
+        return EXTENSION_LANGUAGES.get(most_common_ext, 'python')
     
     def _collect_source_files(self, target: str, language: str) -> List[str]:
         """Collect source files for analysis."""
-        extensions = {
-            'python': {'.py'},
-            'javascript': {'.js'},
-            'typescript': {'.ts'},
-            'java': {'.java'},
-            'cpp': {'.cpp', '.cc', '.cxx'},
-            'c': {'.c', '.h'},
-            'go': {'.go'},
-            'rust': {'.rs'}
-        }
-        
-        valid_extensions = extensions.get(language, {'.py'})
+        valid_extensions = LANGUAGE_EXTENSIONS.get(language, LANGUAGE_EXTENSIONS['python'])
         files = []
+        self._file_sizes = {}
         
-        for root, dirs, filenames in os.walk(target):
-            # Skip common non-source directories
-            dirs[:] = [d for d in dirs if d not in {'.git', '__pycache__', 'node_modules', '.env', 'venv', '.venv', 'build', 'dist', 'target'}]
-            
-            for filename in filenames:
-                if Path(filename).suffix.lower() in valid_extensions:
-                    full_path = os.path.join(root, filename)
-                    # Skip files that are too large
-                    try:
-                        if os.path.getsize(full_path) < 1024 * 1024:  # 1MB limit
-                            files.append(full_path)
-                    except OSError:
-                        continue
+        # Sizes come from the DirEntry stat so later analyses don't stat each file again
+        for entry in walk_tree(target):
+            if os.path.splitext(entry.name)[1].lower() not in valid_extensions:
+                continue
+            # Skip files that are too large
+            try:
+                file_size = entry.stat().st_size
+            except OSError:
+                continue
+            if file_size < 1024 * 1024:  # 1MB limit
+                files.append(entry.path)
+                self._file_sizes[entry.path] = file_size
+                if len(files) >= 200:  # Limit to prevent overwhelming analysis
+                    break
         
-        return files[:200]  # Limit to prevent overwhelming analysis
+        return files
     
     def _analyze_dependencies(self, files: List[str], language: str, depth: int) -> Dict[str, Any]:
         """Analyze dependencies between modules."""
@@ -219,15 +263,15 @@ class ArchitectureAnalysisTool(Tool):
             except:
                 continue
         
+        # Top-level package prefixes, so each import is classified with a single
+        # short-circuiting startswith call instead of scanning every module
+        internal_roots = tuple({module.split('.')[0] for module in internal_modules})
+        
         # Second pass: analyze imports
         for file_path in files:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                try:
-                    tree = ast.parse(content)
-                except SyntaxError:
+                tree = self._parse_python_file(file_path)
+                if tree is None:
                     continue
                 
                 rel_path = os.path.relpath(file_path)
@@ -245,7 +289,7 @@ class ArchitectureAnalysisTool(Tool):
                     
                     for imp in imports:
                         # Determine if it's internal or external
-                        is_internal = any(imp.startswith(internal_mod.split('.')[0]) for internal_mod in internal_modules)
+                        is_internal = imp.startswith(internal_roots)
                         
                         if is_internal:
                             dependencies[current_module].add(imp)
@@ -269,7 +313,7 @@ class ArchitectureAnalysisTool(Tool):
             "external_dependencies": sorted(list(external_deps)),
             "circular_dependencies": circular_deps,
             "dependency_count": {mod: len(deps) for mod, deps in dependencies.items()},
-            "most_dependent_modules": sorted(dependencies.items(), key=lambda x: len(x[1]), reverse=True)[:10]
+            "most_dependent_modules": heapq.nlargest(10, dependencies.items(), key=lambda x: len(x[1]))
         }
     
     def _analyze_js_dependencies(self, files: List[str], depth: int) -> Dict[str, Any]:
@@ -329,14 +373,19 @@ class ArchitectureAnalysisTool(Tool):
         total_lines = 0
         file_line_counts = []
         
-        for file_path in files:
+        # File reads are independent and I/O-bound, so count lines on a thread pool
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+            line_counts = list(executor.map(_count_lines, files))
+        
+        for file_path, counts in zip(files, line_counts):
+            if counts is None:
+                continue
+            
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                    line_count = len(lines)
-                    non_empty_lines = len([line for line in lines if line.strip()])
-                
-                file_size = os.path.getsize(file_path)
+                line_count, non_empty_lines = counts
+                file_size = self._file_sizes.get(file_path)
+                if file_size is None:
+                    file_size = os.path.getsize(file_path)
                 rel_path = os.path.relpath(file_path)
                 
                 structure["file_sizes"][rel_path] = {
@@ -366,7 +415,7 @@ class ArchitectureAnalysisTool(Tool):
                 continue
         
         # Find largest files
-        structure["largest_files"] = sorted(file_line_counts, key=lambda x: x[1], reverse=True)[:10]
+        structure["largest_files"] = heapq.nlargest(10, file_line_counts, key=lambda x: x[1])
         structure["total_lines"] = total_lines
         structure["average_file_size"] = total_lines / len(files) if files else 0
         
@@ -399,12 +448,8 @@ class ArchitectureAnalysisTool(Tool):
         
         for file_path in files:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                try:
-                    tree = ast.parse(content)
-                except SyntaxError:
+                tree = self._parse_python_file(file_path)
+                if tree is None:
                     continue
                 
                 rel_path = os.path.relpath(file_path)
@@ -453,31 +498,24 @@ class ArchitectureAnalysisTool(Tool):
         """General complexity analysis for non-Python files."""
         complexity = {"files": {}, "total_functions": 0, "total_classes": 0}
         
-        # Simple pattern-based analysis
-        function_patterns = [
-            r'^\\s*function\\s+\\w+',  # JavaScript function
-            r'^\\s*def\\s+\\w+',  # Python function  
-            r'^\\s*public\\s+.*\\s+\\w+\\s*\\(',  # Java method
-        ]
-        
-        class_patterns = [
-            r'^\\s*class\\s+\\w+',  # General class
-            r'^\\s*public\\s+class\\s+\\w+',  # Java class
-        ]
-        
         for file_path in files:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
                 functions = 0
                 classes = 0
                 
-                for pattern in function_patterns:
-                    functions += len(re.findall(pattern, content, re.MULTILINE))
-                
-                for pattern in class_patterns:
-                    classes += len(re.findall(pattern, content, re.MULTILINE))
+                # Simple prefix-based analysis, one lstrip() per line
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        stripped = line.lstrip()
+                        if stripped.startswith(('function ', 'def ')):  # JavaScript / Python function
+                            functions += 1
+                        elif stripped.startswith('class '):  # General class
+                            classes += 1
+                        elif stripped.startswith('public '):
+                            if stripped.startswith('public class '):  # Java class
+                                classes += 1
+                            elif '(' in stripped:  # Java method
+                                functions += 1
                 
                 rel_path = os.path.relpath(file_path)
                 complexity["files"][rel_path] = {
@@ -502,15 +540,6 @@ class ArchitectureAnalysisTool(Tool):
             "architecture_issues": []
         }
         
-        # Common design patterns to look for
-        pattern_indicators = {
-            "Singleton": [r'class\\s+\\w+.*:\\s*\\n.*_instance\\s*=', r'getInstance\\(\\)'],
-            "Factory": [r'create\\w*\\(', r'Factory\\w*\\('],
-            "Observer": [r'addObserver', r'notifyObservers', r'addEventListener'],
-            "Strategy": [r'Strategy\\w*', r'\\w*Strategy'],
-            "Decorator": [r'@\\w+', r'decorator'],
-        }
-        
         long_function_threshold = 50
         large_class_threshold = 500
         
@@ -518,39 +547,41 @@ class ArchitectureAnalysisTool(Tool):
             try:
                 with open(file_path, 'r', encoding='utf-8') as f:
                     content = f.read()
-                    lines = content.split('\\n')
+                lines = content.splitlines()
+                line_count = len(lines)
                 
                 rel_path = os.path.relpath(file_path)
                 
                 # Check for design patterns
-                for pattern_name, indicators in pattern_indicators.items():
-                    for indicator in indicators:
-                        if re.search(indicator, content, re.IGNORECASE):
-                            patterns["design_patterns"][pattern_name] += 1
-                            break
+                for pattern_name, indicator_re in DESIGN_PATTERN_INDICATORS.items():
+                    if indicator_re.search(content):
+                        patterns["design_patterns"][pattern_name] += 1
                 
                 # Check for code smells
-                if len(lines) > large_class_threshold:
+                if line_count > large_class_threshold:
                     patterns["code_smells"].append({
                         "type": "Large File",
                         "file": rel_path,
-                        "lines": len(lines),
+                        "lines": line_count,
                         "severity": "medium"
                     })
                 
-                # Long functions (basic detection)
+                # Long functions, measured from the shared parsed tree
                 if language == "python":
-                    function_starts = [(i, line) for i, line in enumerate(lines) if re.match(r'^\\s*def\\s+', line)]
-                    for i, (line_num, func_line) in enumerate(function_starts):
-                        next_func_line = function_starts[i + 1][0] if i + 1 < len(function_starts) else len(lines)
-                        func_length = next_func_line - line_num
+                    tree = self._parse_python_file(file_path)
+                    if tree is None:
+                        continue
+                    
+                    for node in ast.walk(tree):
+                        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                            continue
                         
+                        func_length = node.end_lineno - node.lineno + 1
                         if func_length > long_function_threshold:
-                            func_name = re.search(r'def\\s+(\\w+)', func_line)
                             patterns["code_smells"].append({
                                 "type": "Long Function",
                                 "file": rel_path,
-                                "function": func_name.group(1) if func_name else "unknown",
+                                "function": node.name,
                                 "lines": func_length,
                                 "severity": "medium"
                             })
@@ -560,6 +591,24 @@ class ArchitectureAnalysisTool(Tool):
         
         return patterns
     
+    def _parse_python_file(self, file_path: str) -> Optional[ast.AST]:
+        """Parse a Python file once per modification time; None if it has syntax errors."""
+        mtime = os.path.getmtime(file_path)
+        cached = self._ast_cache.get(file_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        
+        try:
+            tree = ast.parse(content)
+        except SyntaxError:
+            tree = None
+        
+        self._ast_cache[file_path] = (mtime, tree)
+        return tree
+    
     def _calculate_cyclomatic_complexity(self, node: ast.AST) -> int:
         """Calculate cyclomatic complexity for an AST node."""
         complexity = 1  # Base complexity
@@ -610,84 +659,90 @@ class ArchitectureAnalysisTool(Tool):
     
     def _format_text_output(self, results: Dict[str, Any], target: str, file_count: int) -> str:
         """Format analysis results as human-readable text."""
-        output = f"🏗️  Architecture Analysis: {target}\n"
-        output += f"📁 Analyzed {file_count} files\n\n"
+        buf = io.StringIO()
+        write = buf.write
+        
+        write(f"🏗️  Architecture Analysis: {target}\n")
+        write(f"📁 Analyzed {file_count} files\n\n")
         
         # Dependencies
         if "dependencies" in results:
             deps = results["dependencies"]
-            output += "📦 DEPENDENCIES\n" + "=" * 50 + "\n"
+            write("📦 DEPENDENCIES\n" + "=" * 50 + "\n")
             
             if "external_dependencies" in deps:
-                output += f"External packages ({len(deps['external_dependencies'])}): "
-                output += ", ".join(deps["external_dependencies"][:10])
+                write(f"External packages ({len(deps['external_dependencies'])}): ")
+                write(", ".join(deps["external_dependencies"][:10]))
                 if len(deps["external_dependencies"]) > 10:
-                    output += f" ... and {len(deps['external_dependencies']) - 10} more"
-                output += "\n\n"
+                    write(f" ... and {len(deps['external_dependencies']) - 10} more")
+                write("\n\n")
             
             if "circular_dependencies" in deps and deps["circular_dependencies"]:
-                output += f"⚠️  Circular Dependencies Found ({len(deps['circular_dependencies'])}):\n"
+                write(f"⚠️  Circular Dependencies Found ({len(deps['circular_dependencies'])}):\n")
                 for cycle in deps["circular_dependencies"][:5]:
-                    output += f"  • {' → '.join(cycle)} → {cycle[0]}\n"
-                output += "\n"
+                    write(f"  • {' → '.join(cycle)} → {cycle[0]}\n")
+                write("\n")
         
         # Structure
         if "structure" in results:
             struct = results["structure"]
-            output += "📋 STRUCTURE\n" + "=" * 50 + "\n"
-            output += f"Total lines of code: {struct.get('total_lines', 0):,}\n"
-            output += f"Average file size: {struct.get('average_file_size', 0):.1f} lines\n"
+            write("📋 STRUCTURE\n" + "=" * 50 + "\n")
+            write(f"Total lines of code: {struct.get('total_lines', 0):,}\n")
+            write(f"Average file size: {struct.get('average_file_size', 0):.1f} lines\n")
             
             if "largest_files" in struct:
-                output += "\nLargest files:\n"
+                write("\nLargest files:\n")
                 for file_path, lines in struct["largest_files"][:5]:
-                    output += f"  • {file_path}: {lines:,} lines\n"
-            output += "\n"
+                    write(f"  • {file_path}: {lines:,} lines\n")
+            write("\n")
         
         # Complexity
         if "complexity" in results:
             comp = results["complexity"]
-            output += "⚡ COMPLEXITY\n" + "=" * 50 + "\n"
+            write("⚡ COMPLEXITY\n" + "=" * 50 + "\n")
             
             if "functions" in comp and comp["functions"]:
-                output += "Most complex functions:\n"
+                write("Most complex functions:\n")
                 for func in comp["functions"][:5]:
-                    output += f"  • {func['file']}:{func['line']} {func['name']} (complexity: {func['complexity']})\n"
+                    write(f"  • {func['file']}:{func['line']} {func['name']} (complexity: {func['complexity']})\n")
             
             if "total_complexity" in comp:
-                output += f"\nTotal cyclomatic complexity: {comp['total_complexity']}\n"
-            output += "\n"
+                write(f"\nTotal cyclomatic complexity: {comp['total_complexity']}\n")
+            write("\n")
         
         # Patterns
         if "patterns" in results:
             patterns = results["patterns"]
-            output += "🎯 PATTERNS & ISSUES\n" + "=" * 50 + "\n"
+            write("🎯 PATTERNS & ISSUES\n" + "=" * 50 + "\n")
             
             if patterns.get("design_patterns"):
-                output += "Design patterns detected:\n"
+                write("Design patterns detected:\n")
                 for pattern, count in patterns["design_patterns"].most_common():
-                    output += f"  • {pattern}: {count} occurrences\n"
-                output += "\n"
+                    write(f"  • {pattern}: {count} occurrences\n")
+                write("\n")
             
             if patterns.get("code_smells"):
-                output += f"Code smells found ({len(patterns['code_smells'])}):\n"
+                write(f"Code smells found ({len(patterns['code_smells'])}):\n")
                 for smell in patterns["code_smells"][:5]:
-                    output += f"  • {smell['type']} in {smell['file']}\n"
-                output += "\n"
+                    write(f"  • {smell['type']} in {smell['file']}\n")
+                write("\n")
         
-        return output
+        return buf.getvalue()
     
     def _format_graph_output(self, results: Dict[str, Any]) -> str:
         """Format results as a simple graph representation."""
-        output = "DEPENDENCY GRAPH\n" + "=" * 30 + "\n\n"
+        buf = io.StringIO()
+        write = buf.write
+        
+        write("DEPENDENCY GRAPH\n" + "=" * 30 + "\n\n")
         
         if "dependencies" in results and "internal_dependencies" in results["dependencies"]:
             deps = results["dependencies"]["internal_dependencies"]
             
             for module, dependencies in list(deps.items())[:20]:  # Limit output
-                output += f"{module}\n"
+                write(f"{module}\n")
                 for dep in dependencies:
-                    output += f"  └─ {dep}\n"
-                output += "\n"
+                    write(f"  └─ {dep}\n")
+                write("\n")
         
-        return output
\ No newline at end of file
+        return buf.getvalue()
\ No newline at end of file
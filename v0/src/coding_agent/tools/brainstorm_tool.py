@@ -5,6 +5,25 @@ from .base import Tool
 from ..types import ToolResult
 
 
+# Common words dropped from queries
+STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'})
+
+# Programming-related synonyms added for matching keywords
+SYNONYMS = {
+    'function': ['func', 'method', 'def'],
+    'class': ['struct', 'type', 'interface'],
+    'variable': ['var', 'let', 'const'],
+    'error': ['exception', 'fail', 'bug'],
+    'test': ['spec', 'unittest', 'pytest'],
+    'config': ['configuration', 'settings', 'options'],
+    'file': ['document', 'script', 'module']
+}
+
+# Sentence punctuation stripped from query words; identifier characters
+# such as '.', '_', '-' and '/' are kept
+PUNCTUATION_TABLE = str.maketrans('', '', ',;:!?"\'()[]{}')
+
+
 class BrainstormSearchTermsTool(Tool):
     """Tool for brainstorming relevant search terms."""
     
@@ -33,27 +52,15 @@ class BrainstormSearchTermsTool(Tool):
     def execute(self, query: str) -> ToolResult:
         """Generate search terms based on the query."""
         # Simple keyword extraction and expansion
-        words = query.lower().split()
+        words = query.lower().translate(PUNCTUATION_TABLE).split()
         
         # Remove common words
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
-        keywords = [word for word in words if word not in stop_words]
+        keywords = {word for word in words if word not in STOP_WORDS}
         
         # Add programming-related synonyms
-        synonyms = {
-            'function': ['func', 'method', 'def'],
-            'class': ['struct', 'type', 'interface'],
-            'variable': ['var', 'let', 'const'],
-            'error': ['exception', 'fail', 'bug'],
-            'test': ['spec', 'unittest', 'pytest'],
-            'config': ['configuration', 'settings', 'options'],
-            'file': ['document', 'script', 'module']
-        }
-        
         search_terms = set(keywords)
-        for keyword in keywords:
-            if keyword in synonyms:
-                search_terms.update(synonyms[keyword])
+        for keyword in keywords & SYNONYMS.keys():
+            search_terms.update(SYNONYMS[keyword])
         
         return ToolResult(
             success=True, 
@@ -0,0 +1,239 @@
+"""Shared file gathering for the LLM summary and analysis tools."""
+
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from typing import Dict, Iterator, List, Optional, Tuple
+from .file_walk import walk_tree
+
+
+# How long a cached directory scan stays valid (seconds)
+WALK_CACHE_TTL = 30.0
+
+# Project overview files included at the top of a codebase summary
+OVERVIEW_FILES = ('README.md', 'package.json', 'requirements.txt', 'setup.py', 'Cargo.toml')
+
+# Source file extensions gathered for LLM analysis; directory summaries also
+# pick up markdown docs
+SOURCE_EXTENSIONS = frozenset({'.py', '.js', '.ts', '.rs', '.go', '.java', '.cpp', '.h'})
+SUMMARY_EXTENSIONS = SOURCE_EXTENSIONS | {'.md'}
+
+# Files larger than this are almost certainly generated or minified, not source
+MAX_SOURCE_FILE_SIZE = 10 * 1024 * 1024
+
+# Codebase overviews: characters kept per overview file, and how many key
+# source files to include and how much of each
+OVERVIEW_FILE_LIMIT = 2000
+CODEBASE_MAX_FILES = 10
+CODEBASE_FILE_LIMIT = 1500
+
+# Threads used to read gathered files concurrently
+READ_WORKERS = 8
+
+
+def _iter_tree(root: str) -> Iterator[os.DirEntry]:
+    """Yield the entries of files under root, skipping hidden files and build directories.
+    
+    Entries rather than paths are kept so a stat taken once (for a signature
+    or a size check) is reused from the entry's cache.
+    """
+    for entry in walk_tree(root):
+        name = entry.name
+        if not name.startswith('.') and not name.endswith('.pyc'):
+            yield entry
+
+
+def _cached_scan(cache: Dict[str, Tuple[float, List[os.DirEntry]]], root: str) -> List[os.DirEntry]:
+    """Return the file entries under root, scanning the tree at most once per TTL."""
+    cached = cache.get(root)
+    now = time.monotonic()
+    if cached and now - cached[0] < WALK_CACHE_TTL:
+        return cached[1]
+    
+    files = list(_iter_tree(root))
+    cache[root] = (now, files)
+    return files
+
+
+def _tree_signature(root: str, files: List[os.DirEntry]) -> str:
+    """Digest the (path, mtime_ns, size) of every file plus the mtimes of their directories.
+    
+    Sorted so the result does not depend on readdir order; added, deleted and
+    renamed files change it as well as edits.
+    """
+    entries = []
+    for file_entry in files:
+        try:
+            st = file_entry.stat()
+        except OSError:
+            continue
+        entries.append(f"{file_entry.path}\0{st.st_mtime_ns}\0{st.st_size}")
+    for directory in {root, *(os.path.dirname(file_entry.path) for file_entry in files)}:
+        try:
+            entries.append(f"{directory}{os.sep}\0{os.stat(directory).st_mtime_ns}")
+        except OSError:
+            continue
+    
+    digest = hashlib.blake2b(digest_size=16)
+    for entry in sorted(entries):
+        digest.update(entry.encode('utf-8', 'surrogateescape'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def _read_text(file_path: str) -> str:
+    """Read a whole UTF-8 file straight from a raw descriptor.
+    
+    One-shot reads gain nothing from the BufferedReader/TextIOWrapper
+    layers of open(), so read the stat size directly and decode once.
+    """
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        chunks = []
+        chunk = os.read(fd, os.fstat(fd).st_size or 65536)
+        while chunk:
+            chunks.append(chunk)
+            chunk = os.read(fd, 65536)
+    finally:
+        os.close(fd)
+    return b''.join(chunks).decode('utf-8')
+
+
+def _within_size_limit(entry: os.DirEntry) -> bool:
+    """Return whether a file is small enough to be worth sending to the LLM.
+    
+    Uses the entry's cached stat, so files already stat'ed by the signature
+    walk are not stat'ed again.
+    """
+    try:
+        return entry.stat().st_size <= MAX_SOURCE_FILE_SIZE
+    except OSError:
+        return False
+
+
+def _truncate_at_line(content: str, limit: int) -> str:
+    """Cut content to at most limit characters, ending on a whole line.
+    
+    A line cut mid-way spends prompt budget on text the model cannot use;
+    fall back to a hard cut only when that would drop over half the excerpt.
+    """
+    if len(content) <= limit:
+        return content
+    cut = content.rfind('\n', 0, limit)
+    if cut < limit // 2:
+        cut = limit
+    return content[:cut] + "\n... (truncated)"
+
+
+def _read_excerpt(file_path: str, limit: int) -> Optional[str]:
+    """Return a labelled excerpt of a file, or None if it cannot be read as UTF-8."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read(limit + 1)  # One extra character shows whether the file goes on
+        return f"=== {file_path} ===\n{_truncate_at_line(content, limit)}\n"
+    except Exception:
+        return None
+
+
+def _read_excerpts(file_paths: List[str], limit: int) -> List[str]:
+    """Read excerpts of several files concurrently, keeping their order.
+    
+    The reads are IO-bound, so overlapping them hides disk (or network
+    filesystem) latency; unreadable files are dropped.
+    """
+    if len(file_paths) <= 1:
+        excerpts = [_read_excerpt(file_path, limit) for file_path in file_paths]
+    else:
+        with ThreadPoolExecutor(max_workers=min(len(file_paths), READ_WORKERS)) as executor:
+            excerpts = list(executor.map(lambda file_path: _read_excerpt(file_path, limit), file_paths))
+    return [excerpt for excerpt in excerpts if excerpt is not None]
+
+
+class CodeGatherer:
+    """Collects labelled file excerpts for LLM prompts.
+    
+    Directory walks are cached per target (see WALK_CACHE_TTL) and shared by
+    content gathering and change detection.
+    """
+    
+    def __init__(self, extensions: frozenset = SOURCE_EXTENSIONS, per_file_limit: int = 2000, max_files: int = 8):
+        self.extensions = extensions
+        self.per_file_limit = per_file_limit
+        self.max_files = max_files
+        self._walk_cache: Dict[str, Tuple[float, List[os.DirEntry]]] = {}
+        self._last_target: Optional[str] = None
+    
+    def reset(self, target: str):
+        """Drop cached directory walks when pointed at a new target."""
+        if target != self._last_target:
+            self._walk_cache.clear()
+            self._last_target = target
+    
+    def target_signature(self, path: str) -> Optional[str]:
+        """Fingerprint of a file, or of every scanned file under a directory.
+        
+        Directories are always walked afresh rather than served from the walk
+        cache, so new files show up at once; the fresh walk then backs the
+        gather that follows.
+        """
+        if os.path.isfile(path):
+            st = os.stat(path)
+            return f"{st.st_mtime_ns}:{st.st_size}"
+        if not os.path.isdir(path):
+            return None
+        
+        files = list(_iter_tree(path))
+        self._walk_cache[path] = (time.monotonic(), files)
+        return _tree_signature(path, files)
+    
+    def gather_codebase(self) -> List[str]:
+        """Gather overview files and key source files, one section per file."""
+        # Add project overview files (one readdir instead of a stat per candidate)
+        cwd_entries = set(os.listdir('.'))
+        overview_parts = _read_excerpts([file for file in OVERVIEW_FILES if file in cwd_entries], OVERVIEW_FILE_LIMIT)
+        
+        # Add key source files (limit to prevent context overflow)
+        source_files = [
+            entry for entry in _cached_scan(self._walk_cache, '.')
+            if os.path.splitext(entry.name)[1] in SOURCE_EXTENSIONS
+        ]
+        
+        # Sort by relevance (main files first, then by name)
+        source_files.sort(key=lambda x: (
+            0 if 'main' in x.name.lower() else
+            1 if 'app' in x.name.lower() else
+            2 if 'index' in x.name.lower() else 3,
+            x.path
+        ))
+        
+        # Add top source files (limit to prevent context overflow)
+        top_files = [entry.path for entry in islice(filter(_within_size_limit, source_files), CODEBASE_MAX_FILES)]
+        source_parts = _read_excerpts(top_files, CODEBASE_FILE_LIMIT)
+        
+        return list(chain(overview_parts, source_parts))
+    
+    def gather_file(self, file_path: str) -> str:
+        """Gather the full content of a specific file."""
+        try:
+            content = _read_text(file_path)
+            return f"=== {file_path} ===\n{content}"
+        except Exception as e:
+            return f"=== {file_path} ===\nError reading file: {e}"
+    
+    def gather_directory(self, dir_path: str) -> List[str]:
+        """Gather matching files from a directory, one section per file."""
+        try:
+            # Gather relevant files from the directory
+            source_files = [
+                entry for entry in _cached_scan(self._walk_cache, dir_path)
+                if os.path.splitext(entry.name)[1] in self.extensions
+            ]
+            source_files.sort(key=lambda entry: entry.path)
+            
+            # Add files up to a reasonable limit
+            selected = [entry.path for entry in islice(filter(_within_size_limit, source_files), self.max_files)]
+            return _read_excerpts(selected, self.per_file_limit)
+        except Exception as e:
+            return [f"Error reading directory {dir_path}: {e}"]
\ No newline at end of file
@@ -1,19 +1,313 @@
 """Code generation tools for creating boilerplate, templates, and scaffolding."""
 
+import hashlib
+import json
 import os
 import re
-from typing import Dict, Any, List, Optional
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache, partial
+from types import MappingProxyType
+from typing import Callable, Dict, Any, Iterator, List, Optional
 from pathlib import Path
 from .base import Tool
+from .file_walk import walk_tree
 from ..types import ToolResult
 from ..providers.base import ModelProvider
 
 
+# Invariant instructions placed ahead of the request details in every LLM
+# generation prompt, so repeated calls share a cacheable prefix
+GENERATION_PREAMBLE = """You are generating {language} code.
+Generate clean, well-documented code with appropriate comments.
+Return ONLY the code, no explanations or markdown formatting.
+
+"""
+
+
+@lru_cache(maxsize=32)
+def _generation_preamble(language: str) -> str:
+    """Render the static prompt prefix once per language."""
+    return GENERATION_PREAMBLE.format(language=language)
+
+
+# Replaces the "code only" reply format when several files share one request
+BATCH_GENERATION_INSTRUCTIONS = """Several files are requested below. Instead of returning bare code, respond
+with ONLY a JSON object of the form {"files": [{"name": "<name>", "code": "<code>"}]}
+containing one entry per request, in the order given.
+
+"""
+
+
+def _parse_batch_response(content: str, count: int) -> Optional[List[str]]:
+    """Extract the per-file code strings from a batch JSON response."""
+    start, end = content.find('{'), content.rfind('}')
+    if start < 0 or end < start:
+        return None
+    try:
+        data = json.loads(content[start:end + 1])
+    except ValueError:
+        return None
+    
+    files = data.get("files") if isinstance(data, dict) else None
+    if not isinstance(files, list) or len(files) != count:
+        return None
+    codes = [entry.get("code") if isinstance(entry, dict) else None for entry in files]
+    if not all(isinstance(code, str) for code in codes):
+        return None
+    return codes
+
+
+# Source file extensions and the language they indicate
+_EXT_TO_LANG = MappingProxyType({
+    '.tsx': 'typescript',
+    '.ts': 'typescript',
+    '.jsx': 'javascript',
+    '.js': 'javascript',
+    '.py': 'python',
+    '.java': 'java',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.cpp': 'cpp',
+    '.c': 'cpp',
+    '.cc': 'cpp'
+})
+
+# File extension used for generated code in each language
+_LANG_TO_EXT = MappingProxyType({
+    "python": ".py",
+    "javascript": ".js",
+    "typescript": ".ts",
+    "java": ".java",
+    "go": ".go",
+    "rust": ".rs",
+    "cpp": ".cpp"
+})
+
+# Template names accept dashes as well as underscores
+_DASH_TO_UNDERSCORE = str.maketrans('-', '_')
+
+# Keyword hints for inferring a template, in precedence order
+_DIRECTORY_TEMPLATE_HINTS = (
+    ('frontend', 'react_component'),
+    ('client', 'react_component'),
+    ('backend', 'api_endpoint'),
+    ('api', 'api_endpoint'),
+    ('test', 'test_file'),
+)
+_DESCRIPTION_TEMPLATE_HINTS = (
+    ('component', 'react_component'),
+    ('api', 'api_endpoint'),
+    ('endpoint', 'api_endpoint'),
+    ('test', 'test_file'),
+    ('class', 'class'),
+    ('function', 'function'),
+)
+
+
+def _hint_pattern(hints) -> re.Pattern:
+    """Compile a pattern finding every (possibly overlapping) hint keyword."""
+    return re.compile('(?=(%s))' % '|'.join(re.escape(keyword) for keyword, _ in hints))
+
+
+_DIRECTORY_HINT_PATTERN = _hint_pattern(_DIRECTORY_TEMPLATE_HINTS)
+_DESCRIPTION_HINT_PATTERN = _hint_pattern(_DESCRIPTION_TEMPLATE_HINTS)
+
+
+def _match_template_hint(pattern: re.Pattern, hints, text: str) -> Optional[str]:
+    """Scan text once and return the template of the highest-precedence hint."""
+    found = {match.group(1) for match in pattern.finditer(text)}
+    if found:
+        for keyword, template in hints:
+            if keyword in found:
+                return template
+    return None
+
+
+# Markdown fences and chatty lead-ins stripped from LLM responses
+CODE_FENCE_PATTERN = re.compile(r'```\n?')
+RESPONSE_PREFIX_PATTERN = re.compile(r"^(Here's|Here is).*?:\n", re.IGNORECASE | re.MULTILINE)
+
+
+@lru_cache(maxsize=32)
+def _language_fence_pattern(language: str):
+    """Compile the opening fence pattern for a language tag."""
+    return re.compile(rf'```{re.escape(language)}\n', re.IGNORECASE)
+
+
+# Generated scaffolding is written without fsync: it is cheap to regenerate
+# and syncing every file would dominate the cost of batch scaffolding
+_FSYNC_AFTER_WRITE = False
+
+
+def _has_content(path: str, data: bytes) -> bool:
+    """Check whether a file already holds exactly these bytes."""
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+        with open(path, 'rb') as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+
+def _write_file_bytes(path: str, data: bytes):
+    """Write pre-encoded bytes straight to a file descriptor.
+    
+    Regenerating identical output leaves the file untouched, so its mtime
+    does not change and file watchers or incremental builds are not triggered.
+    """
+    if _has_content(path, data):
+        return
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        if _FSYNC_AFTER_WRITE:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# Output directories already created by this process
+_DIRS_CREATED: set = set()
+
+
+def _ensure_dir(directory: str):
+    """Create a directory tree once per process."""
+    if directory and directory not in _DIRS_CREATED:
+        os.makedirs(directory, exist_ok=True)
+        _DIRS_CREATED.add(directory)
+
+
+# How long a provider availability check is reused (seconds)
+AVAILABILITY_CACHE_TTL = 5.0
+
+# LLM-generated code kept per tool instance, keyed by prompt hash
+LLM_CACHE_SIZE = 128
+
+
+def _cache_get(cache: OrderedDict, key):
+    """Look up an LRU entry, marking it most recently used."""
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _cache_put(cache: OrderedDict, key, value):
+    """Insert an LRU entry, evicting the oldest beyond LLM_CACHE_SIZE."""
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > LLM_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def _prompt_key(prompt: str) -> bytes:
+    """Hash a prompt into a compact cache key."""
+    return hashlib.blake2b(prompt.encode('utf-8'), digest_size=16).digest()
+
+# Languages with built-in templates; others fall back to the LLM
+TEMPLATE_LANGUAGES = frozenset({"python", "javascript", "typescript", "java"})
+
+# Rendered template outputs kept per tool instance
+TEMPLATE_CACHE_SIZE = 512
+
+
+def _freeze_params(params: dict) -> tuple:
+    """Convert template parameters into a hashable cache key.
+    
+    Only flat values and lists of them are frozen; anything else raises
+    TypeError so the caller renders without caching.
+    """
+    frozen = []
+    for key, value in params.items():
+        if isinstance(value, (list, tuple)):
+            if any(isinstance(item, (dict, list, set)) for item in value):
+                raise TypeError("unfreezable template parameter")
+            value = tuple(value)
+        elif isinstance(value, (dict, set)):
+            raise TypeError("unfreezable template parameter")
+        frozen.append((key, value))
+    return tuple(sorted(frozen))
+
+
+# Files sampled before the extension ratio is considered settled
+LANGUAGE_SCAN_MAX_FILES = 5000
+
+
+def _iter_file_names(path: str):
+    """Yield non-hidden file names below path, skipping build/cache dirs."""
+    for entry in walk_tree(path):
+        if not entry.name.startswith('.'):
+            yield entry.name
+
+
+# JSON schema for the generate_code tool, built once at import
+_PARAMETERS_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "template": {
+            "type": "string",
+            "enum": ["class", "function", "api_endpoint", "react_component", "react-component", "test_file", "config", "custom"],
+            "description": "Type of code to generate"
+        },
+        "language": {
+            "type": "string",
+            "enum": ["python", "javascript", "typescript", "java", "go", "rust", "cpp"],
+            "description": "Programming language for generated code"
+        },
+        "name": {
+            "type": "string", 
+            "description": "Name of the class, function, component, or file"
+        },
+        "file_path": {
+            "type": "string",
+            "description": "Path where the generated code should be saved"
+        },
+        "content": {
+            "type": "string",
+            "description": "Direct code content to write to file (alternative to template generation)"
+        },
+        "description": {
+            "type": "string",
+            "description": "Detailed description of what the code should do (for LLM generation)"
+        },
+        "parameters": {
+            "type": "object",
+            "description": "Additional parameters for template customization",
+            "properties": {
+                "base_class": {"type": "string"},
+                "methods": {"type": "array", "items": {"type": "string"}},
+                "imports": {"type": "array", "items": {"type": "string"}},
+                "framework": {"type": "string"},
+                "async": {"type": "boolean"}
+            }
+        }
+    },
+    "required": []
+}
+
+
 class CodeGeneratorTool(Tool):
     """Tool for generating code from templates, boilerplate, and LLM-powered scaffolding."""
     
-    def __init__(self, model_provider: Optional[ModelProvider] = None):
+    def __init__(self, model_provider: Optional[ModelProvider] = None, enable_cache: bool = True,
+                 stream_callback: Optional[Callable[[str], None]] = None):
         self.model_provider = model_provider
+        # Receives LLM-generated code as it streams in, e.g. to show progress
+        self.stream_callback = stream_callback
+        # Disable for non-deterministic providers where repeats should differ
+        self.enable_cache = enable_cache
+        self._llm_cache: OrderedDict = OrderedDict()
+        # Template rendering is pure, so repeat scaffolding requests reuse the output
+        self._template_dispatch = self._build_template_dispatch()
+        self._render_template_cached = lru_cache(maxsize=TEMPLATE_CACHE_SIZE)(self._render_frozen_template)
+        # (cwd, mtime of cwd, language) from the last project language scan
+        self._lang_cache: Optional[tuple] = None
+        # (checked at, available) from the last provider availability probe
+        self._avail_cache: Optional[tuple] = None
     
     @property
     def name(self) -> str:
@@ -25,49 +319,7 @@ class CodeGeneratorTool(Tool):
     
     @property
     def parameters_schema(self) -> Dict[str, Any]:
-        return {
-            "type": "object",
-            "properties": {
-                "template": {
-                    "type": "string",
-                    "enum": ["class", "function", "api_endpoint", "react_component", "react-component", "test_file", "config", "custom"],
-                    "description": "Type of code to generate"
-                },
-                "language": {
-                    "type": "string",
-                    "enum": ["python", "javascript", "typescript", "java", "go", "rust", "cpp"],
-                    "description": "Programming language for generated code"
-                },
-                "name": {
-                    "type": "string", 
-                    "description": "Name of the class, function, component, or file"
-                },
-                "file_path": {
-                    "type": "string",
-                    "description": "Path where the generated code should be saved"
-                },
-                "content": {
-                    "type": "string",
-                    "description": "Direct code content to write to file (alternative to template generation)"
-                },
-                "description": {
-                    "type": "string",
-                    "description": "Detailed description of what the code should do (for LLM generation)"
-                },
-                "parameters": {
-                    "type": "object",
-                    "description": "Additional parameters for template customization",
-                    "properties": {
-                        "base_class": {"type": "string"},
-                        "methods": {"type": "array", "items": {"type": "string"}},
-                        "imports": {"type": "array", "items": {"type": "string"}},
-                        "framework": {"type": "string"},
-                        "async": {"type": "boolean"}
-                    }
-                }
-            },
-            "required": []
-        }
+        return _PARAMETERS_SCHEMA
     
     @property
     def is_destructive(self) -> bool:
@@ -75,47 +327,11 @@ class CodeGeneratorTool(Tool):
     
     def execute(self, **parameters) -> ToolResult:
         """Generate code based on template type and parameters."""
-        template = parameters.get("template")
-        language = parameters.get("language")
-        name = parameters.get("name")
         file_path = parameters.get("file_path")
         content = parameters.get("content")
         description = parameters.get("description", "")
         template_params = parameters.get("parameters", {})
-        
-        # Auto-detect language if not provided
-        if not language:
-            # Try to detect from file path first
-            if file_path:
-                language = self._detect_language_from_file_path(file_path)
-            
-            # Fallback to project-wide detection
-            if not language:
-                language = self._detect_prominent_language()
-        
-        # Normalize template name (handle dashes vs underscores)
-        if template:
-            template = template.replace('-', '_')
-        
-        # Handle missing template by inferring from context
-        if not template:
-            template = self._infer_template_from_context(parameters, language)
-        
-        # Default name if not provided
-        if not name:
-            if file_path:
-                # Extract name from file path (remove extension)
-                name = Path(file_path).stem
-            else:
-                name = template or "generated_code"
-        
-        # Final validation - ensure we have valid values
-        if not template:
-            template = "function"  # Ultimate fallback
-        if not language:
-            language = "python"   # Ultimate fallback
-        if not name:
-            name = "generated_code"  # Ultimate fallback
+        template, language, name = self._resolve_request(parameters)
         
         try:
             # If content is provided directly, use that instead of generating
@@ -123,7 +339,7 @@ class CodeGeneratorTool(Tool):
                 generated_code = content
             elif template == "custom" and description:
                 # Use LLM for custom code generation
-                if not self.model_provider or not self.model_provider.is_available():
+                if not self._provider_available():
                     return ToolResult(
                         success=False,
                         output=None,
@@ -166,10 +382,17 @@ class CodeGeneratorTool(Tool):
                     resolved_path = self._resolve_project_path(file_path)
                     
                     # Ensure directory exists
-                    os.makedirs(os.path.dirname(resolved_path), exist_ok=True)
+                    directory = os.path.dirname(resolved_path)
+                    _ensure_dir(directory)
                     
-                    with open(resolved_path, 'w', encoding='utf-8') as f:
-                        f.write(generated_code)
+                    data = generated_code.encode('utf-8')
+                    try:
+                        _write_file_bytes(resolved_path, data)
+                    except FileNotFoundError:
+                        # Directory was removed since it was cached; recreate it
+                        _DIRS_CREATED.discard(directory)
+                        _ensure_dir(directory)
+                        _write_file_bytes(resolved_path, data)
                     
                     return ToolResult(
                         success=True,
@@ -196,29 +419,159 @@ class CodeGeneratorTool(Tool):
                 error=f"Error generating code: {str(e)}"
             )
     
+    def _resolve_request(self, parameters: dict) -> tuple:
+        """Fill in template, language and name from the request and project context."""
+        template = parameters.get("template")
+        language = parameters.get("language")
+        name = parameters.get("name")
+        file_path = parameters.get("file_path")
+        
+        # Auto-detect language if not provided
+        if not language:
+            # Try to detect from file path first
+            if file_path:
+                language = self._detect_language_from_file_path(file_path)
+            
+            # Fallback to project-wide detection
+            if not language:
+                language = self._detect_prominent_language()
+        
+        # Normalize template name (handle dashes vs underscores)
+        if template:
+            template = template.translate(_DASH_TO_UNDERSCORE)
+        
+        # Handle missing template by inferring from context
+        if not template:
+            template = self._infer_template_from_context(parameters, language)
+        
+        # Default name if not provided
+        if not name:
+            if file_path:
+                # Extract name from file path (remove extension)
+                name = Path(file_path).stem
+            else:
+                name = template or "generated_code"
+        
+        # Final validation - ensure we have valid values
+        if not template:
+            template = "function"  # Ultimate fallback
+        if not language:
+            language = "python"   # Ultimate fallback
+        if not name:
+            name = "generated_code"  # Ultimate fallback
+        
+        return template, language, name
+    
+    def execute_batch(self, specs: List[Dict[str, Any]]) -> List[ToolResult]:
+        """Generate several files, sharing one LLM call per language for custom code.
+        
+        Each spec takes the same parameters as execute(). Custom-code specs are
+        generated together with a structured JSON response; anything the batch
+        call does not produce falls back to a normal execute() call.
+        """
+        prefetched = self._prefetch_custom_batch(specs)
+        results = []
+        for i, spec in enumerate(specs):
+            if i in prefetched:
+                spec = {**spec, "content": prefetched[i]}
+            results.append(self.execute(**spec))
+        return results
+    
+    def _prefetch_custom_batch(self, specs: List[Dict[str, Any]]) -> Dict[int, str]:
+        """Generate the custom-code specs in one request per language."""
+        groups: Dict[str, list] = {}
+        for i, spec in enumerate(specs):
+            description = spec.get("description", "")
+            if spec.get("content") or not description:
+                continue
+            template, language, name = self._resolve_request(spec)
+            if template == "custom":
+                groups.setdefault(language, []).append((i, name, description, spec.get("parameters", {})))
+        
+        # Lone requests gain nothing from batching and keep the per-prompt caches
+        groups = {language: items for language, items in groups.items() if len(items) > 1}
+        if not groups or not self._provider_available():
+            return {}
+        
+        prefetched = {}
+        for language, items in groups.items():
+            try:
+                prefetched.update(self._generate_custom_batch(language, items))
+            except Exception:
+                continue  # Fall back to per-item generation for this language
+        return prefetched
+    
+    def _generate_custom_batch(self, language: str, items: list) -> Dict[int, str]:
+        """Ask for several files in one structured response, keyed by spec index."""
+        requests = "\n".join(
+            f"### Request {n}\n" + self._dynamic_generation_tail(language, name, description, params)
+            for n, (_, name, description, params) in enumerate(items, 1)
+        )
+        response = self.model_provider.generate_with_prefix(
+            self._static_generation_preamble(language),
+            BATCH_GENERATION_INSTRUCTIONS + requests
+        )
+        
+        codes = _parse_batch_response(response.content, len(items))
+        if codes is None:
+            return {}
+        
+        prefetched = {}
+        for (i, *_), code in zip(items, codes):
+            code = self._extract_code_from_response(code.strip(), language)
+            if code:
+                prefetched[i] = code
+        return prefetched
+    
     def _generate_custom_code(self, language: str, name: str, description: str, params: dict) -> str:
         """Generate custom code using LLM."""
-        prompt = self._build_generation_prompt(language, name, description, params)
-        response = self.model_provider.generate(prompt)
+        preamble = self._static_generation_preamble(language)
+        tail = self._dynamic_generation_tail(language, name, description, params)
+        
+        key = None
+        if self.enable_cache:
+            key = _prompt_key(preamble + tail)
+            cached = _cache_get(self._llm_cache, key)
+            if cached is not None:
+                return cached
+        
+        if self.stream_callback is not None:
+            content = self._stream_generation(preamble + tail)
+        else:
+            # Static instructions go first so the provider can reuse their prefill
+            content = self.model_provider.generate_with_prefix(preamble, tail).content
         
-        if not response.content.strip():
+        if not content.strip():
             return None
         
         # Extract code from LLM response
-        return self._extract_code_from_response(response.content.strip(), language)
+        code = self._extract_code_from_response(content.strip(), language)
+        if key is not None:
+            _cache_put(self._llm_cache, key, code)
+        return code
+    
+    def _stream_generation(self, prompt: str) -> str:
+        """Stream a generation to the callback as it arrives and return the full text."""
+        chunks = []
+        for chunk in self.model_provider.generate_stream(prompt):
+            self.stream_callback(chunk)
+            chunks.append(chunk)
+        return "".join(chunks)
     
     def _generate_template_code(self, template: str, language: str, name: str, params: dict) -> str:
         """Generate code using predefined templates."""
         try:
-            if language == "python":
-                return self._generate_python_template(template, name, params)
-            elif language in ["javascript", "typescript"]:
-                return self._generate_js_template(template, name, params, language == "typescript")
-            elif language == "java":
-                return self._generate_java_template(template, name, params)
+            if language in TEMPLATE_LANGUAGES:
+                try:
+                    params_key = _freeze_params(params)
+                    hash(params_key)
+                except (TypeError, AttributeError):
+                    # Unhashable parameter values; render without caching
+                    return self._render_template(template, language, name, params)
+                return self._render_template_cached(template, language, name, params_key)
             else:
                 # For other languages, fall back to LLM if available
-                if self.model_provider and self.model_provider.is_available():
+                if self._provider_available():
                     description = f"Create a {template} named {name} in {language}"
                     return self._generate_custom_code(language, name, description, params)
                 # Last resort: generate a simple placeholder
@@ -227,43 +580,64 @@ class CodeGeneratorTool(Tool):
             # If template generation fails, return a basic placeholder
             return f"// Error generating {template}: {str(e)}\n// TODO: Implement {template} functionality\n"
     
-    def _generate_python_template(self, template: str, name: str, params: dict) -> str:
-        """Generate Python code templates."""
-        if template == "class":
-            base_class = params.get("base_class", "")
-            methods = params.get("methods", [])
-            imports = params.get("imports", [])
-            
-            code = ""
-            if imports:
-                code += "\n".join(f"from {imp}" for imp in imports if imp) + "\n\n"
-            
-            inheritance = f"({base_class})" if base_class else ""
-            code += f"class {name}{inheritance}:\n"
-            code += f'    """Class {name}."""\n\n'
-            
-            if not methods:
-                code += "    def __init__(self):\n"
-                code += "        pass\n"
-            else:
-                for method in methods:
-                    if method:
-                        code += f"    def {method}(self):\n"
-                        code += f'        """Method {method}."""\n'
-                        code += "        pass\n\n"
-            
-            return code
-            
-        elif template == "function":
-            is_async = params.get("async", False)
-            func_prefix = "async def" if is_async else "def"
-            
-            return f'{func_prefix} {name}():\n    """Function {name}."""\n    pass\n'
-            
-        elif template == "api_endpoint":
-            framework = params.get("framework", "flask")
-            if framework == "flask":
-                return f'''from flask import Flask, jsonify, request
+    def _provider_available(self) -> bool:
+        """Check provider availability, reusing a recent result."""
+        if not self.model_provider:
+            return False
+        
+        now = time.monotonic()
+        if self._avail_cache and now - self._avail_cache[0] < AVAILABILITY_CACHE_TTL:
+            return self._avail_cache[1]
+        
+        available = self.model_provider.is_available()
+        self._avail_cache = (now, available)
+        return available
+    
+    def _render_template(self, template: str, language: str, name: str, params: dict) -> str:
+        """Render a predefined template for one of the supported languages."""
+        render = self._template_dispatch.get((language, template))
+        return render(name, params) if render else None
+    
+    def _render_frozen_template(self, template: str, language: str, name: str, params_key: tuple) -> str:
+        """Cacheable form of _render_template taking frozen parameters."""
+        return self._render_template(template, language, name, dict(params_key))
+    
+    def _build_template_dispatch(self) -> Dict[tuple, Any]:
+        """Map (language, template) pairs to their renderers."""
+        dispatch = {
+            ("python", "class"): self._python_class,
+            ("python", "function"): self._python_function,
+            ("python", "api_endpoint"): self._python_api_endpoint,
+            ("python", "test_file"): self._python_test_file,
+            ("java", "class"): self._java_class,
+            ("java", "function"): self._java_function,
+        }
+        for language, is_typescript in (("javascript", False), ("typescript", True)):
+            dispatch[(language, "function")] = partial(self._js_function, is_typescript=is_typescript)
+            dispatch[(language, "react_component")] = partial(self._js_react_component, is_typescript=is_typescript)
+            dispatch[(language, "api_endpoint")] = self._js_api_endpoint
+        return dispatch
+    
+    def _python_class(self, name: str, params: dict) -> str:
+        """Python class template."""
+        return "".join(self._iter_python_class(
+            name, params.get("base_class", ""), params.get("methods", []), params.get("imports", [])
+        ))
+    
+    def _python_function(self, name: str, params: dict) -> str:
+        """Python function template."""
+        is_async = params.get("async", False)
+        func_prefix = "async def" if is_async else "def"
+        
+        return f'{func_prefix} {name}():\n    """Function {name}."""\n    pass\n'
+    
+    def _python_api_endpoint(self, name: str, params: dict) -> Optional[str]:
+        """Python API endpoint template (Flask only)."""
+        framework = params.get("framework", "flask")
+        if framework != "flask":
+            return None
+        
+        return f'''from flask import Flask, jsonify, request
 
 app = Flask(__name__)
 
@@ -278,9 +652,10 @@ def {name}():
 if __name__ == '__main__':
     app.run(debug=True)
 '''
-            
-        elif template == "test_file":
-            return f'''import unittest
+    
+    def _python_test_file(self, name: str, params: dict) -> str:
+        """Python unittest module template."""
+        return f'''import unittest
 
 class Test{name.title()}(unittest.TestCase):
     """Test cases for {name}."""
@@ -300,21 +675,33 @@ class Test{name.title()}(unittest.TestCase):
 if __name__ == '__main__':
     unittest.main()
 '''
+    
+    def _iter_python_class(self, name: str, base_class: str, methods: List[str], imports: List[str]) -> Iterator[str]:
+        """Yield a Python class skeleton chunk by chunk."""
+        if imports:
+            yield "\n".join(f"from {imp}" for imp in imports if imp) + "\n\n"
         
-        return None
+        inheritance = f"({base_class})" if base_class else ""
+        yield f'class {name}{inheritance}:\n    """Class {name}."""\n\n'
+        
+        if not methods:
+            yield "    def __init__(self):\n        pass\n"
+        else:
+            for method in methods:
+                if method:
+                    yield f'    def {method}(self):\n        """Method {method}."""\n        pass\n\n'
     
-    def _generate_js_template(self, template: str, name: str, params: dict, is_typescript: bool) -> str:
-        """Generate JavaScript/TypeScript code templates."""
+    def _js_function(self, name: str, params: dict, is_typescript: bool) -> str:
+        """JavaScript/TypeScript function template."""
         type_annotation = ": void" if is_typescript else ""
-        
-        if template == "function":
-            is_async = params.get("async", False)
-            func_prefix = "async function" if is_async else "function"
-            return f'{func_prefix} {name}(){type_annotation} {{\\n    // Function {name}\\n}}\\n'
-            
-        elif template == "react_component":
-            if is_typescript:
-                return f'''import React from 'react';
+        is_async = params.get("async", False)
+        func_prefix = "async function" if is_async else "function"
+        return f'{func_prefix} {name}(){type_annotation} {{\n    // Function {name}\n}}\n'
+    
+    def _js_react_component(self, name: str, params: dict, is_typescript: bool) -> str:
+        """React function component template."""
+        if is_typescript:
+            return f'''import React from 'react';
 
 interface {name}Props {{
     // Define props here
@@ -330,8 +717,7 @@ const {name}: React.FC<{name}Props> = (props) => {{
 
 export default {name};
 '''
-            else:
-                return f'''import React from 'react';
+        return f'''import React from 'react';
 
 const {name} = (props) => {{
     return (
@@ -343,9 +729,10 @@ const {name} = (props) => {{
 
 export default {name};
 '''
-                
-        elif template == "api_endpoint":
-            return f'''const express = require('express');
+    
+    def _js_api_endpoint(self, name: str, params: dict) -> str:
+        """Express API endpoint template."""
+        return f'''const express = require('express');
 const app = express();
 
 app.use(express.json());
@@ -363,40 +750,41 @@ app.listen(PORT, () => {{
     console.log(`Server running on port ${{PORT}}`);
 }});
 '''
-        
-        return None
     
-    def _generate_java_template(self, template: str, name: str, params: dict) -> str:
-        """Generate Java code templates."""
-        if template == "class":
-            base_class = params.get("base_class", "")
-            methods = params.get("methods", [])
-            
-            inheritance = f" extends {base_class}" if base_class else ""
-            code = f"public class {name}{inheritance} {{\n"
-            
-            # Constructor
-            code += f"    public {name}() {{\n"
-            code += "        // Constructor\n"
-            code += "    }\n\n"
-            
-            # Methods
-            for method in methods:
-                if method:
-                    code += f"    public void {method}() {{\n"
-                    code += f"        // Method {method}\n"
-                    code += "    }\n\n"
-            
-            code += "}\n"
-            return code
-            
-        elif template == "function":
-            return f"public static void {name}() {{\n    // Method {name}\n}}\n"
+    def _java_class(self, name: str, params: dict) -> str:
+        """Java class template."""
+        return "".join(self._iter_java_class(name, params.get("base_class", ""), params.get("methods", [])))
+    
+    def _java_function(self, name: str, params: dict) -> str:
+        """Java static method template."""
+        return f"public static void {name}() {{\n    // Method {name}\n}}\n"
+    
+    def _iter_java_class(self, name: str, base_class: str, methods: List[str]) -> Iterator[str]:
+        """Yield a Java class skeleton chunk by chunk."""
+        inheritance = f" extends {base_class}" if base_class else ""
+        yield f"public class {name}{inheritance} {{\n"
         
-        return None
+        # Constructor
+        yield f"    public {name}() {{\n        // Constructor\n    }}\n\n"
+        
+        # Methods
+        for method in methods:
+            if method:
+                yield f"    public void {method}() {{\n        // Method {method}\n    }}\n\n"
+        
+        yield "}\n"
     
     def _build_generation_prompt(self, language: str, name: str, description: str, params: dict) -> str:
         """Build prompt for LLM code generation."""
+        return (self._static_generation_preamble(language) +
+                self._dynamic_generation_tail(language, name, description, params))
+    
+    def _static_generation_preamble(self, language: str) -> str:
+        """Instructions shared by every generation request for a language."""
+        return _generation_preamble(language)
+    
+    def _dynamic_generation_tail(self, language: str, name: str, description: str, params: dict) -> str:
+        """Request-specific part of the generation prompt."""
         prompt = f"Generate {language} code for: {description}\n\n"
         prompt += f"Requirements:\n"
         prompt += f"- Name: {name}\n"
@@ -413,60 +801,54 @@ app.listen(PORT, () => {{
         if params.get("imports"):
             prompt += f"- Required imports: {', '.join(params['imports'])}\n"
         
-        prompt += "\nGenerate clean, well-documented code with appropriate comments."
-        prompt += "\nReturn ONLY the code, no explanations or markdown formatting."
-        
         return prompt
     
     def _extract_code_from_response(self, response: str, language: str) -> str:
         """Extract clean code from LLM response."""
         # Remove markdown code blocks if present
-        response = re.sub(f'```{language}\\n', '', response, flags=re.IGNORECASE)
-        response = re.sub('```\\n?', '', response)
-        response = re.sub('```', '', response)
+        response = _language_fence_pattern(language).sub('', response)
+        response = CODE_FENCE_PATTERN.sub('', response)
         
         # Remove common prefixes
-        response = re.sub(r'^(Here\'s|Here is).*?:\\n', '', response, flags=re.IGNORECASE | re.MULTILINE)
+        response = RESPONSE_PREFIX_PATTERN.sub('', response)
         
         return response.strip()
     
     def _detect_prominent_language(self) -> str:
         """Detect the most prominent programming language in the current directory."""
         try:
-            file_counts = {}
-            
-            # Count files by extension in current directory and subdirectories
-            for root, dirs, files in os.walk('.'):
-                # Skip hidden directories and common build/cache directories
-                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in {'node_modules', '__pycache__', 'venv', 'env'}]
-                
-                for file in files:
-                    if file.startswith('.'):
-                        continue
-                    ext = Path(file).suffix.lower()
-                    file_counts[ext] = file_counts.get(ext, 0) + 1
+            cwd = os.getcwd()
+            mtime = os.stat(cwd).st_mtime
+        except OSError:
+            cwd, mtime = None, None
+        
+        # Reuse the last scan until the top-level directory changes
+        if self._lang_cache and cwd is not None and self._lang_cache[:2] == (cwd, mtime):
+            return self._lang_cache[2]
+        
+        language = self._scan_prominent_language()
+        if cwd is not None:
+            self._lang_cache = (cwd, mtime, language)
+        return language
+    
+    def _scan_prominent_language(self) -> str:
+        """Count source files by extension to find the dominant language."""
+        try:
+            file_counts = Counter()
             
-            # Map extensions to languages
-            ext_to_lang = {
-                '.py': 'python',
-                '.js': 'javascript',
-                '.ts': 'typescript',
-                '.jsx': 'javascript',
-                '.tsx': 'typescript',
-                '.java': 'java',
-                '.go': 'go',
-                '.rs': 'rust',
-                '.cpp': 'cpp',
-                '.c': 'cpp',
-                '.cc': 'cpp'
-            }
+            # Count files by extension in current directory and subdirectories,
+            # stopping once enough files have been seen to judge the mix
+            for scanned, file in enumerate(_iter_file_names('.'), 1):
+                i = file.rfind('.')
+                file_counts[file[i:].lower() if i > 0 else ''] += 1
+                if scanned >= LANGUAGE_SCAN_MAX_FILES:
+                    break
             
             # Find most common language
-            lang_counts = {}
+            lang_counts = Counter()
             for ext, count in file_counts.items():
-                if ext in ext_to_lang:
-                    lang = ext_to_lang[ext]
-                    lang_counts[lang] = lang_counts.get(lang, 0) + count
+                if ext in _EXT_TO_LANG:
+                    lang_counts[_EXT_TO_LANG[ext]] += count
             
             if lang_counts:
                 return max(lang_counts, key=lang_counts.get)
@@ -482,38 +864,18 @@ app.listen(PORT, () => {{
         if not file_path:
             return None
         
-        ext = Path(file_path).suffix.lower()
-        
-        # Map extensions to languages
-        ext_to_lang = {
-            '.tsx': 'typescript',
-            '.ts': 'typescript', 
-            '.jsx': 'javascript',
-            '.js': 'javascript',
-            '.py': 'python',
-            '.java': 'java',
-            '.go': 'go',
-            '.rs': 'rust',
-            '.cpp': 'cpp',
-            '.c': 'cpp',
-            '.cc': 'cpp'
-        }
-        
-        return ext_to_lang.get(ext)
+        return _EXT_TO_LANG.get(Path(file_path).suffix.lower())
     
     def _infer_template_from_context(self, parameters: dict, language: str) -> str:
         """Infer template type from available parameters and context."""
         # Check for specific template hints in parameters
         if 'directory' in parameters:
             directory = parameters['directory'].lower()
-            if 'frontend' in directory or 'client' in directory:
-                if language in ['javascript', 'typescript']:
-                    return 'react_component'
+            hint = _match_template_hint(_DIRECTORY_HINT_PATTERN, _DIRECTORY_TEMPLATE_HINTS, directory)
+            if hint == 'react_component' and language not in ['javascript', 'typescript']:
                 return 'function'
-            elif 'backend' in directory or 'api' in directory:
-                return 'api_endpoint'
-            elif 'test' in directory:
-                return 'test_file'
+            if hint:
+                return hint
         
         # Check file path for hints
         file_path = parameters.get('file_path', '')
@@ -524,16 +886,9 @@ app.listen(PORT, () => {{
         
         # Check for description hints
         description = parameters.get('description', '').lower()
-        if 'component' in description:
-            return 'react_component'
-        elif 'api' in description or 'endpoint' in description:
-            return 'api_endpoint'
-        elif 'test' in description:
-            return 'test_file'
-        elif 'class' in description:
-            return 'class'
-        elif 'function' in description:
-            return 'function'
+        hint = _match_template_hint(_DESCRIPTION_HINT_PATTERN, _DESCRIPTION_TEMPLATE_HINTS, description)
+        if hint:
+            return hint
         
         # Check template_params for hints
         template_params = parameters.get('parameters', {})
@@ -552,26 +907,14 @@ app.listen(PORT, () => {{
     
     def _determine_file_path(self, template: str, language: str, name: str) -> str:
         """Determine appropriate file path for generated code."""
-        extensions = {
-            "python": ".py",
-            "javascript": ".js", 
-            "typescript": ".ts",
-            "java": ".java",
-            "go": ".go",
-            "rust": ".rs",
-            "cpp": ".cpp"
-        }
-        
-        ext = extensions.get(language, ".txt")
+        if template == "react_component":
+            return f"src/components/{name}{_LANG_TO_EXT['typescript'] if language == 'typescript' else '.js'}"
         
+        ext = _LANG_TO_EXT.get(language, ".txt")
+        name_lc = name.lower()
         if template == "test_file":
-            return f"tests/test_{name.lower()}{ext}"
-        elif template == "react_component":
-            return f"src/components/{name}{extensions.get('typescript', '.js') if language == 'typescript' else '.js'}"
-        elif template == "api_endpoint":
-            return f"src/{name.lower()}{ext}"
-        else:
-            return f"src/{name.lower()}{ext}"
+            return f"tests/test_{name_lc}{ext}"
+        return f"src/{name_lc}{ext}"
     
     def _resolve_project_path(self, file_path: str) -> str:
         """Resolve file path, checking for recent project directories."""
@@ -1,17 +1,64 @@
 """Code quality metrics tool with complexity analysis and technical debt detection."""
 
 import ast
+import fnmatch
+from array import array
+import hashlib
+import heapq
+import io
 import re
 import os
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple, Set
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple, Set
 from collections import defaultdict, Counter
 from .base import Tool
+from .file_walk import SKIP_DIRS, walk_tree
+from .json_cache import JsonLRUStore
+from .process_pool import map_in_processes
 from ..types import ToolResult
 
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
 
-class ComplexityCalculator(ast.NodeVisitor):
-    """Calculate various complexity metrics for Python code."""
+
+# Larger files (usually generated or vendored) are skipped unless the caller raises the limit
+DEFAULT_MAX_FILE_BYTES = 1 << 20
+
+# Files listed in the detailed breakdown, lowest maintainability first
+DETAILED_FILES_SHOWN = 10
+# Critical (high severity) smells listed in the report
+CRITICAL_SMELLS_SHOWN = 5
+
+# Smaller file sets are analyzed in this process; see map_in_processes
+PARALLEL_ANALYSIS_MIN_FILES = 64
+
+# Per-file analysis results, keyed by content digest with (mtime, size) pointers per path
+QUALITY_CACHE_PATH = Path.home() / ".cache" / "coding_agent" / "quality" / "analysis.json"
+# Bump when analyzer output or the cache layout changes so stale entries are ignored
+QUALITY_CACHE_VERSION = 2
+# Least recently used results and path pointers beyond this many are dropped on save
+QUALITY_CACHE_MAX_ENTRIES = 50000
+
+
+if HAS_XXHASH:
+    def _line_hash(line: str) -> int:
+        """Hash a line identically across processes and runs."""
+        return xxhash.xxh3_64_intdigest(line.encode('utf-8'))
+else:
+    def _line_hash(line: str) -> int:
+        """Hash a line identically across processes and runs."""
+        return int.from_bytes(hashlib.blake2b(line.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class UnifiedAnalyzer(ast.NodeVisitor):
+    """Calculate complexity metrics and detect code smells in one AST walk."""
+    
+    # Node type -> visitor function, shared by all instances and filled on first sight
+    _visitors: Dict[type, Callable] = {}
     
     def __init__(self):
         self.cyclomatic_complexity = 1  # Base complexity
@@ -23,17 +70,32 @@ class ComplexityCalculator(ast.NodeVisitor):
         self.lines_of_code = 0
         self.comment_lines = 0
         self.blank_lines = 0
+        self.smells = []
+        self.current_function = None
+        self.current_class = None
+        # If node -> depth of the if chain nested directly beneath it
+        self._if_heights: Dict[ast.If, int] = {}
         
-    def calculate_metrics(self, tree: ast.AST, source: str) -> Dict[str, Any]:
-        """Calculate all metrics for the given AST and source."""
-        self.source_lines = source.split('\n')
-        self.lines_of_code = len([line for line in self.source_lines if line.strip()])
-        self.comment_lines = len([line for line in self.source_lines if line.strip().startswith('#')])
-        self.blank_lines = len([line for line in self.source_lines if not line.strip()])
+    def analyze(self, tree: ast.AST, source_lines: List[str], file_path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Return the metrics and code smells for the given AST and source lines."""
+        self.file_path = file_path
+        self.source_lines = source_lines
+        
+        # Classify every line in one pass, stripping each once
+        code = comments = blanks = 0
+        for line in self.source_lines:
+            stripped = line.strip()
+            if not stripped:
+                blanks += 1
+            else:
+                code += 1
+                if stripped[0] == '#':
+                    comments += 1
+        self.lines_of_code, self.comment_lines, self.blank_lines = code, comments, blanks
         
         self.visit(tree)
         
-        return {
+        metrics = {
             'cyclomatic_complexity': self.cyclomatic_complexity,
             'cognitive_complexity': self.cognitive_complexity,
             'max_nesting_depth': self.max_depth,
@@ -45,35 +107,74 @@ class ComplexityCalculator(ast.NodeVisitor):
             'total_lines': len(self.source_lines),
             'comment_ratio': self.comment_lines / max(1, self.lines_of_code),
         }
+        return metrics, self.smells
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._visitors = {}
     
     def visit(self, node):
-        """Override visit to track nesting depth."""
-        if isinstance(node, (ast.If, ast.For, ast.While, ast.With, ast.Try, ast.FunctionDef, ast.ClassDef)):
-            self.depth += 1
-            self.max_depth = max(self.max_depth, self.depth)
-        
-        super().visit(node)
-        
-        if isinstance(node, (ast.If, ast.For, ast.While, ast.With, ast.Try, ast.FunctionDef, ast.ClassDef)):
-            self.depth -= 1
+        """Dispatch by node type without building the visit_* method name per node."""
+        node_type = type(node)
+        visitor = self._visitors.get(node_type)
+        if visitor is None:
+            cls = type(self)
+            visitor = getattr(cls, 'visit_' + node_type.__name__, cls.generic_visit)
+            self._visitors[node_type] = visitor
+        return visitor(self, node)
+    
+    def generic_visit(self, node):
+        """Visit all child nodes, reading fields directly rather than via ast.iter_fields."""
+        visit = self.visit
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ast.AST):
+                        visit(item)
+            elif isinstance(value, ast.AST):
+                visit(value)
+    
+    def _enter_nested(self):
+        """Open a nesting level; callers close it after visiting their children."""
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
     
     def visit_If(self, node):
         """Visit if statements."""
+        self._enter_nested()
         self.cyclomatic_complexity += 1
         self.cognitive_complexity += 1 + self.depth  # Nesting increases cognitive load
+        
+        # Check for deeply nested conditions
+        if self._if_nesting_height(node) > 4:
+            self.smells.append({
+                'type': 'deeply_nested_conditionals',
+                'severity': 'medium',
+                'message': "Deeply nested if statements detected",
+                'file': self.file_path,
+                'line': node.lineno,
+                'suggestion': "Consider using early returns or extracting methods"
+            })
+        
         self.generic_visit(node)
+        self.depth -= 1
     
     def visit_While(self, node):
         """Visit while loops."""
+        self._enter_nested()
         self.cyclomatic_complexity += 1
         self.cognitive_complexity += 1 + self.depth
         self.generic_visit(node)
+        self.depth -= 1
     
     def visit_For(self, node):
         """Visit for loops."""
+        self._enter_nested()
         self.cyclomatic_complexity += 1
         self.cognitive_complexity += 1 + self.depth
         self.generic_visit(node)
+        self.depth -= 1
     
     def visit_ExceptHandler(self, node):
         """Visit except handlers."""
@@ -83,90 +184,27 @@ class ComplexityCalculator(ast.NodeVisitor):
     
     def visit_With(self, node):
         """Visit with statements."""
+        self._enter_nested()
         self.cyclomatic_complexity += len(node.items)
         self.cognitive_complexity += 1 + self.depth
         self.generic_visit(node)
+        self.depth -= 1
     
-    def visit_FunctionDef(self, node):
-        """Visit function definitions."""
-        self.function_count += 1
-        self.generic_visit(node)
-    
-    def visit_AsyncFunctionDef(self, node):
-        """Visit async function definitions."""
-        self.function_count += 1
-        self.generic_visit(node)
-    
-    def visit_ClassDef(self, node):
-        """Visit class definitions."""
-        self.class_count += 1
+    def visit_Try(self, node):
+        """Visit try statements."""
+        self._enter_nested()
         self.generic_visit(node)
-    
-    def visit_BoolOp(self, node):
-        """Visit boolean operations (and/or)."""
-        self.cyclomatic_complexity += len(node.values) - 1
-        self.cognitive_complexity += len(node.values) - 1
-        self.generic_visit(node)
-
-
-class DuplicationDetector:
-    """Detect code duplication."""
-    
-    def __init__(self, min_lines: int = 6):
-        self.min_lines = min_lines
-        self.line_hashes = defaultdict(list)
-    
-    def add_file(self, file_path: str, content: str):
-        """Add file content for duplication analysis."""
-        lines = [line.strip() for line in content.split('\n') if line.strip()]
-        
-        # Create sliding window of lines
-        for i in range(len(lines) - self.min_lines + 1):
-            window = '\n'.join(lines[i:i + self.min_lines])
-            hash_val = hash(window)
-            self.line_hashes[hash_val].append({
-                'file': file_path,
-                'start_line': i + 1,
-                'content': window
-            })
-    
-    def find_duplicates(self) -> List[Dict[str, Any]]:
-        """Find duplicate code blocks."""
-        duplicates = []
-        
-        for hash_val, locations in self.line_hashes.items():
-            if len(locations) > 1:
-                duplicates.append({
-                    'locations': locations,
-                    'duplicate_lines': self.min_lines,
-                    'occurrences': len(locations)
-                })
-        
-        return sorted(duplicates, key=lambda x: x['occurrences'], reverse=True)
-
-
-class CodeSmellDetector(ast.NodeVisitor):
-    """Detect common code smells."""
-    
-    def __init__(self):
-        self.smells = []
-        self.current_function = None
-        self.current_class = None
-    
-    def detect_smells(self, tree: ast.AST, source: str, file_path: str) -> List[Dict[str, Any]]:
-        """Detect code smells in the AST."""
-        self.file_path = file_path
-        self.source_lines = source.split('\n')
-        self.visit(tree)
-        return self.smells
+        self.depth -= 1
     
     def visit_FunctionDef(self, node):
-        """Visit function definitions to detect smells."""
+        """Visit function definitions, detecting long and over-parameterized functions."""
+        self.function_count += 1
         old_function = self.current_function
         self.current_function = node.name
         
         # Long function smell
-        if hasattr(node, 'end_lineno') and node.end_lineno:
+        # end_lineno is always present from Python 3.8, but may be None on synthesized nodes
+        if node.end_lineno:
             function_length = node.end_lineno - node.lineno
             if function_length > 50:
                 self.smells.append({
@@ -190,30 +228,38 @@ class CodeSmellDetector(ast.NodeVisitor):
                 'suggestion': "Consider using a configuration object or breaking the function"
             })
         
+        self._enter_nested()
         self.generic_visit(node)
+        self.depth -= 1
         self.current_function = old_function
     
+    def visit_AsyncFunctionDef(self, node):
+        """Visit async function definitions."""
+        self.function_count += 1
+        self.generic_visit(node)
+    
     def visit_ClassDef(self, node):
-        """Visit class definitions to detect smells."""
+        """Visit class definitions, detecting god classes and method-less classes."""
+        self.class_count += 1
         old_class = self.current_class
         self.current_class = node.name
         
-        # Count methods and attributes
-        methods = [n for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+        # Count methods defined directly in the class body
+        method_count = sum(1 for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef)))
         
         # God class smell
-        if len(methods) > 20:
+        if method_count > 20:
             self.smells.append({
                 'type': 'god_class',
                 'severity': 'high',
-                'message': f"Class '{node.name}' has {len(methods)} methods",
+                'message': f"Class '{node.name}' has {method_count} methods",
                 'file': self.file_path,
                 'line': node.lineno,
                 'suggestion': "Consider breaking this class into smaller, more focused classes"
             })
         
         # Class with no methods (data class smell)
-        if len(methods) == 0:
+        if method_count == 0:
             self.smells.append({
                 'type': 'data_class',
                 'severity': 'low',
@@ -223,37 +269,259 @@ class CodeSmellDetector(ast.NodeVisitor):
                 'suggestion': "Consider using a dataclass or namedtuple instead"
             })
         
+        self._enter_nested()
         self.generic_visit(node)
+        self.depth -= 1
         self.current_class = old_class
     
-    def visit_If(self, node):
-        """Visit if statements to detect complex conditions."""
-        # Check for deeply nested conditions
-        if self._count_nested_ifs(node) > 4:
-            self.smells.append({
-                'type': 'deeply_nested_conditionals',
-                'severity': 'medium',
-                'message': "Deeply nested if statements detected",
-                'file': self.file_path,
-                'line': node.lineno,
-                'suggestion': "Consider using early returns or extracting methods"
-            })
-        
+    def visit_BoolOp(self, node):
+        """Visit boolean operations (and/or)."""
+        self.cyclomatic_complexity += len(node.values) - 1
+        self.cognitive_complexity += len(node.values) - 1
         self.generic_visit(node)
     
-    def _count_nested_ifs(self, node, depth=0):
-        """Count nested if statements recursively."""
-        max_depth = depth
-        for child in ast.iter_child_nodes(node):
-            if isinstance(child, ast.If):
-                child_depth = self._count_nested_ifs(child, depth + 1)
-                max_depth = max(max_depth, child_depth)
-        return max_depth
+    def _if_nesting_height(self, node) -> int:
+        """Return how many ifs nest directly beneath node, memoized per node.
+        
+        Computed post-order with an explicit stack, so each if's children are
+        scanned once however deep the chain and without hitting the recursion limit.
+        """
+        heights = self._if_heights
+        stack = [(node, None)]
+        while stack:
+            current, children = stack.pop()
+            if current in heights:
+                continue
+            if children is None:
+                children = [child for child in ast.iter_child_nodes(current) if isinstance(child, ast.If)]
+                stack.append((current, children))
+                stack.extend((child, None) for child in children if child not in heights)
+            else:
+                heights[current] = max((heights[child] + 1 for child in children), default=0)
+        return heights[node]
+
+
+class DuplicationDetector:
+    """Detect code duplication.
+    
+    Window hashes are collected per file in compact arrays; locations are
+    only materialized for hashes that occur more than once, which is a small
+    fraction of the windows in typical code.
+    """
+    
+    # Rolling hash parameters: windows are hashed as polynomials over stable per-line hashes
+    HASH_BASE = 1000003
+    HASH_MOD = (1 << 61) - 1
+    
+    def __init__(self, min_lines: int = 6):
+        self.min_lines = min_lines
+        # (file, window hashes in start_line order) per added file
+        self._file_windows: List[Tuple[str, array]] = []
+        # Duplicated window hash -> [(file, start_line), ...], filled by find_duplicates
+        self.line_hashes = defaultdict(list)
+    
+    @staticmethod
+    def significant_lines(source_lines: List[str]) -> List[str]:
+        """Return the stripped, non-blank lines compared for duplication."""
+        return [stripped for stripped in map(str.strip, source_lines) if stripped]
+    
+    @classmethod
+    def significant_line_hashes(cls, source_lines: List[str], min_lines: int = 0) -> List[int]:
+        """Return stable hashes of the significant lines, in order.
+        
+        Files with fewer than min_lines significant lines cannot hold a
+        duplicate window, so their lines are not hashed at all.
+        """
+        lines = cls.significant_lines(source_lines)
+        if len(lines) < min_lines:
+            return []
+        return [_line_hash(line) for line in lines]
+    
+    def add_file(self, file_path: str, content: str):
+        """Add file content for duplication analysis."""
+        self.add_line_hashes(file_path, self.significant_line_hashes(content.split('\n')))
+    
+    def add_lines(self, file_path: str, lines: List[str]):
+        """Add a file's significant lines for duplication analysis."""
+        self.add_line_hashes(file_path, [_line_hash(line) for line in lines])
+    
+    def add_line_hashes(self, file_path: str, line_h: List[int]):
+        """Add a file's significant line hashes for duplication analysis.
+        
+        Each window's hash is slid forward in O(1) from the previous one
+        instead of joining and hashing the window's text.
+        """
+        window = self.min_lines
+        if len(line_h) < window:
+            return
+        
+        base, mod = self.HASH_BASE, self.HASH_MOD
+        # Weight of the line leaving the window
+        base_w = pow(base, window - 1, mod)
+        
+        h = 0
+        for value in line_h[:window]:
+            h = (h * base + value) % mod
+        
+        hashes = array('Q', [h])
+        append = hashes.append
+        for i in range(1, len(line_h) - window + 1):
+            h = ((h - line_h[i - 1] * base_w) * base + line_h[i + window - 1]) % mod
+            append(h)
+        self._file_windows.append((file_path, hashes))
+    
+    def find_duplicates(self) -> List[Dict[str, Any]]:
+        """Find duplicate code blocks."""
+        # Count every window first, then keep locations only for repeated ones
+        counts = Counter()
+        for _, hashes in self._file_windows:
+            counts.update(hashes)
+        
+        line_hashes = self.line_hashes
+        line_hashes.clear()
+        for file_path, hashes in self._file_windows:
+            for i, h in enumerate(hashes):
+                if counts[h] > 1:
+                    line_hashes[h].append((file_path, i + 1))
+        
+        duplicates = []
+        
+        for hash_val, locations in self.line_hashes.items():
+            if len(locations) > 1:
+                duplicates.append({
+                    'locations': [{'file': file_path, 'start_line': start_line} for file_path, start_line in locations],
+                    'duplicate_lines': self.min_lines,
+                    'occurrences': len(locations)
+                })
+        
+        return sorted(duplicates, key=lambda x: x['occurrences'], reverse=True)
+
+
+def _content_digest(data: bytes) -> str:
+    """Hash file bytes into a content-addressed cache key."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _file_digest(file_path: str) -> Optional[str]:
+    """Return the content digest of a file, or None if it cannot be read."""
+    try:
+        with open(file_path, 'rb') as f:
+            return _content_digest(f.read())
+    except OSError:
+        return None
+
+
+def _analyze_file(file_path: str, want_complexity: bool, want_smells: bool,
+                  want_duplication: bool, min_duplication_lines: int = 0) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """Read, parse and analyze one file; runs in worker processes.
+    
+    Returns the digest of the bytes actually analyzed alongside the result,
+    which is None for empty or unparseable files. If a later stage fails,
+    the results of the earlier stages are still returned.
+    """
+    digest = None
+    result = {}
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        digest = _content_digest(data)
+        # Same text as reading in text mode with errors='ignore' and universal newlines
+        content = data.decode('utf-8', errors='ignore').replace('\r\n', '\n').replace('\r', '\n')
+        
+        # Skip empty files
+        if not content.strip():
+            return digest, None
+        
+        tree = ast.parse(content)
+        # Split once and share the lines between the AST analysis and duplication
+        source_lines = content.split('\n')
+        
+        if want_complexity or want_smells:
+            metrics, smells = UnifiedAnalyzer().analyze(tree, source_lines, file_path)
+            if want_complexity:
+                result['metrics'] = metrics
+            if want_smells:
+                result['smells'] = smells
+        # Line hashes are stable across processes and smaller to send back than the lines
+        if want_duplication:
+            result['duplication_hashes'] = DuplicationDetector.significant_line_hashes(source_lines, min_duplication_lines)
+    except Exception:
+        return digest, result or None
+    return digest, result
+
+
+@lru_cache(maxsize=4096)
+def _maintainability_index(lines_of_code: int, cyclomatic_complexity: int, comment_ratio: float) -> float:
+    """Calculate maintainability index (0-100, higher is better).
+    
+    Memoized on the exact inputs, which repeat across files with the same
+    size, complexity and comment count.
+    """
+    # Simplified maintainability index calculation
+    # Based on Halstead volume, cyclomatic complexity, and lines of code
+    
+    loc = max(1, lines_of_code)
+    cc = max(1, cyclomatic_complexity)
+    
+    # Simple formula (actual MI is more complex)
+    mi = max(0, (171 - 5.2 * (cc / 10) - 0.23 * (loc / 100) + 16.2 * (comment_ratio * 100)) * 100 / 171)
+    return min(100, mi)
+
+
+@lru_cache(maxsize=4096)
+def _quality_grade(score: float) -> str:
+    """Get quality grade from score."""
+    if score >= 85:
+        return "A"
+    elif score >= 70:
+        return "B"
+    elif score >= 55:
+        return "C"
+    elif score >= 40:
+        return "D"
+    else:
+        return "F"
+
+
+def _name_matcher(pattern: str) -> Callable[[str], bool]:
+    """Build a file name predicate for a glob pattern, compiled once per walk."""
+    suffix = pattern[1:]
+    # Plain "*.ext" patterns reduce to a suffix test
+    if pattern.startswith('*') and suffix and not any(c in suffix for c in '*?['):
+        return lambda name: name.endswith(suffix)
+    
+    match = re.compile(fnmatch.translate(pattern)).match
+    return lambda name: match(name) is not None
+
+
+def _iter_files(root: str, pattern: str, ignore_dirs: frozenset = SKIP_DIRS) -> Iterator[str]:
+    """Lazily yield files under root whose names match pattern, pruning ignored and hidden directories."""
+    matches = _name_matcher(pattern)
+    prefix_len = len(os.curdir + os.sep) if root == os.curdir else 0
+    for entry in walk_tree(root, ignore_dirs):
+        if matches(entry.name):
+            yield entry.path[prefix_len:]
+
+
+def _read_duplication_hashes(file_path: str, min_lines: int = 0) -> Optional[List[int]]:
+    """Read a file's significant line hashes for duplication analysis."""
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            return DuplicationDetector.significant_line_hashes(f.read().split('\n'), min_lines)
+    except OSError:
+        return None
 
 
 class CodeQualityMetricsTool(Tool):
     """Comprehensive code quality analysis tool."""
     
+    def __init__(self, cache_path: Optional[Path] = None, enable_cache: bool = True):
+        self.cache_path = Path(cache_path) if cache_path else QUALITY_CACHE_PATH
+        # 'files': absolute path -> [mtime_ns, size, digest]; 'results': "digest:options" -> result.
+        # With caching disabled, results are only reused within this instance
+        self._cache = JsonLRUStore(self.cache_path, QUALITY_CACHE_VERSION, ('files', 'results'),
+                                   QUALITY_CACHE_MAX_ENTRIES, enabled=enable_cache)
+    
     @property
     def name(self) -> str:
         return "code_quality_metrics"
@@ -295,6 +563,11 @@ class CodeQualityMetricsTool(Tool):
                     "type": "boolean",
                     "default": False,
                     "description": "Include detailed per-file breakdown"
+                },
+                "max_file_bytes": {
+                    "type": "integer",
+                    "default": DEFAULT_MAX_FILE_BYTES,
+                    "description": "Skip files larger than this many bytes"
                 }
             }
         }
@@ -303,46 +576,112 @@ class CodeQualityMetricsTool(Tool):
     def is_destructive(self) -> bool:
         return False
     
-    def _get_files(self, path: str, file_pattern: str) -> List[Path]:
+    def _get_files(self, path: str, file_pattern: str) -> List[str]:
         """Get files to analyze."""
         search_path = Path(path)
         if not search_path.exists():
             return []
         
         if search_path.is_file():
-            return [search_path]
-        
-        # Handle different file patterns
-        if file_pattern.startswith("*."):
-            extension = file_pattern[1:]
-            return list(search_path.rglob(f"*{extension}"))
-        
-        return list(search_path.rglob(file_pattern))
-    
-    def _calculate_maintainability_index(self, metrics: Dict[str, Any]) -> float:
-        """Calculate maintainability index (0-100, higher is better)."""
-        # Simplified maintainability index calculation
-        # Based on Halstead volume, cyclomatic complexity, and lines of code
-        
-        loc = max(1, metrics['lines_of_code'])
-        cc = max(1, metrics['cyclomatic_complexity'])
-        
-        # Simple formula (actual MI is more complex)
-        mi = max(0, (171 - 5.2 * (cc / 10) - 0.23 * (loc / 100) + 16.2 * (metrics['comment_ratio'] * 100)) * 100 / 171)
-        return min(100, mi)
-    
-    def _get_quality_grade(self, score: float) -> str:
-        """Get quality grade from score."""
-        if score >= 85:
-            return "A"
-        elif score >= 70:
-            return "B"
-        elif score >= 55:
-            return "C"
-        elif score >= 40:
-            return "D"
-        else:
-            return "F"
+            return [str(search_path)]
+        
+        # Patterns spanning directories still need rglob's path matching
+        if '/' in file_pattern or os.sep in file_pattern:
+            return [str(file_path) for file_path in search_path.rglob(file_pattern)]
+        
+        return list(_iter_files(str(search_path), file_pattern))
+    
+    def _analyze_files(self, files: List[str], want_complexity: bool, want_smells: bool,
+                       want_duplication: bool, max_file_bytes: Optional[int] = None,
+                       min_duplication_lines: int = 0) -> List[Optional[Dict[str, Any]]]:
+        """Analyze files in order, reusing cached results for unchanged content.
+        
+        Results are stored under a digest of the file's bytes, so renames and
+        branch switches that restore earlier content still hit. Each path keeps
+        a pointer from its (mtime, size) to the digest, so unchanged files are
+        not re-hashed. Files larger than max_file_bytes are skipped (None)
+        without being read.
+        
+        Only complexity metrics and smells are cached; duplication line hashes
+        are cheap to recompute and would make the cache as large as the tree.
+        """
+        cache = self._cache
+        pointers, cached_results = cache.section('files'), cache.section('results')
+        options = f"{int(want_complexity)}{int(want_smells)}"
+        results: List[Optional[Dict[str, Any]]] = [None] * len(files)
+        misses = []
+        
+        for i, file_path in enumerate(files):
+            key = os.path.abspath(file_path)
+            try:
+                st = os.stat(file_path)
+                stat = [st.st_mtime_ns, st.st_size]
+            except OSError:
+                misses.append((i, key))
+                continue
+            
+            if max_file_bytes is not None and stat[1] > max_file_bytes:
+                continue
+            
+            pointer = pointers.get(key)
+            digest = pointer[2] if pointer and pointer[:2] == stat else _file_digest(file_path)
+            if digest is None:
+                cache.discard('files', key)
+                misses.append((i, key))
+                continue
+            if pointer != stat + [digest]:
+                cache.put('files', key, stat + [digest])
+            else:
+                cache.touch('files', key)
+            
+            result_key = f"{digest}:{options}"
+            if result_key not in cached_results:
+                misses.append((i, key))
+                continue
+            
+            result = cache.touch('results', result_key)
+            if result is not None:
+                # Cached smells may come from the same content at another path
+                if 'smells' in result:
+                    result = {**result, 'smells': [{**smell, 'file': file_path} for smell in result['smells']]}
+                if want_duplication:
+                    line_hashes = _read_duplication_hashes(file_path, min_duplication_lines)
+                    if line_hashes is not None:
+                        result = {**result, 'duplication_hashes': line_hashes}
+            results[i] = result
+        
+        analyzed = self._run_analysis([files[i] for i, _ in misses], want_complexity, want_smells,
+                                      want_duplication, min_duplication_lines)
+        for (i, key), (digest, result) in zip(misses, analyzed):
+            results[i] = result
+            if digest is None:
+                continue
+            # Store under the digest of the bytes actually analyzed; if the file
+            # changed after it was hashed, its pointer is stale
+            pointer = pointers.get(key)
+            if pointer and pointer[2] != digest:
+                cache.discard('files', key)
+            cached = None if result is None else {k: v for k, v in result.items() if k != 'duplication_hashes'}
+            cache.put('results', f"{digest}:{options}", cached)
+        
+        cache.save()
+        return results
+    
+    def _run_analysis(self, files: List[str], want_complexity: bool, want_smells: bool,
+                      want_duplication: bool, min_duplication_lines: int = 0) -> List[Tuple[Optional[str], Optional[Dict[str, Any]]]]:
+        """Analyze files in order into (digest, result) pairs, across worker processes for large sets."""
+        if not files:
+            return []
+        
+        analyze = partial(_analyze_file, want_complexity=want_complexity,
+                          want_smells=want_smells, want_duplication=want_duplication,
+                          min_duplication_lines=min_duplication_lines)
+        
+        results = map_in_processes(analyze, files, min_items=PARALLEL_ANALYSIS_MIN_FILES)
+        if results is not None:
+            return results
+        
+        return [analyze(file_path) for file_path in files]
     
     def execute(self, **parameters) -> ToolResult:
         """Execute code quality analysis."""
@@ -352,6 +691,7 @@ class CodeQualityMetricsTool(Tool):
             metrics_to_calculate = parameters.get("metrics", ["all"])
             min_duplication_lines = parameters.get("min_duplication_lines", 6)
             detailed = parameters.get("detailed", False)
+            max_file_bytes = parameters.get("max_file_bytes", DEFAULT_MAX_FILE_BYTES)
             
             if "all" in metrics_to_calculate:
                 metrics_to_calculate = ["complexity", "duplication", "smells", "maintainability"]
@@ -375,29 +715,32 @@ class CodeQualityMetricsTool(Tool):
                 'total_functions': 0,
                 'total_classes': 0,
                 'high_complexity_functions': 0,
-                'smells': [],
-                'file_details': []
+                'smell_counts': Counter(),
+                'smells_by_severity': defaultdict(list),
+                'maintainability_total': 0.0,
+                'maintainability_count': 0,
+                # Max-heap (by negated maintainability, then order) of the worst files
+                'worst_files': []
             }
             
-            output_lines = ["📊 Code Quality Analysis Report\n"]
+            buf = io.StringIO()
+            write = buf.write
+            write("📊 Code Quality Analysis Report\n\n")
             
             # Analyze each file
-            for file_path in files:
+            want_complexity = "complexity" in metrics_to_calculate or "maintainability" in metrics_to_calculate
+            results = self._analyze_files(files, want_complexity, "smells" in metrics_to_calculate,
+                                          duplication_detector is not None, max_file_bytes,
+                                          min_duplication_lines=min_duplication_lines)
+            
+            for file_path, result in zip(files, results):
+                if result is None:
+                    continue
+                
                 try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    
-                    # Skip empty files
-                    if not content.strip():
-                        continue
-                    
-                    tree = ast.parse(content)
-                    
-                    # Calculate complexity metrics
-                    if "complexity" in metrics_to_calculate or "maintainability" in metrics_to_calculate:
-                        calculator = ComplexityCalculator()
-                        file_metrics = calculator.calculate_metrics(tree, content)
-                        
+                    # Merge complexity metrics
+                    file_metrics = result.get('metrics')
+                    if file_metrics is not None:
                         # Update totals
                         total_metrics['files_analyzed'] += 1
                         total_metrics['total_lines'] += file_metrics['total_lines']
@@ -409,28 +752,30 @@ class CodeQualityMetricsTool(Tool):
                             total_metrics['high_complexity_functions'] += 1
                         
                         if detailed:
-                            maintainability = self._calculate_maintainability_index(file_metrics)
-                            grade = self._get_quality_grade(maintainability)
+                            maintainability = _maintainability_index(file_metrics['lines_of_code'],
+                                                                     file_metrics['cyclomatic_complexity'],
+                                                                     file_metrics['comment_ratio'])
+                            total_metrics['maintainability_total'] += maintainability
+                            total_metrics['maintainability_count'] += 1
                             
-                            total_metrics['file_details'].append({
-                                'file': str(file_path),
-                                'metrics': file_metrics,
-                                'maintainability': maintainability,
-                                'grade': grade
-                            })
+                            # Keep only the worst files; earlier files win ties
+                            entry = (-maintainability, -total_metrics['maintainability_count'], file_path, file_metrics)
+                            worst_files = total_metrics['worst_files']
+                            if len(worst_files) < DETAILED_FILES_SHOWN:
+                                heapq.heappush(worst_files, entry)
+                            else:
+                                heapq.heappushpop(worst_files, entry)
                     
-                    # Detect code smells
-                    if "smells" in metrics_to_calculate:
-                        smell_detector = CodeSmellDetector()
-                        smells = smell_detector.detect_smells(tree, content, str(file_path))
-                        total_metrics['smells'].extend(smells)
+                    # Collect code smells
+                    if 'smells' in result:
+                        for smell in result['smells']:
+                            total_metrics['smells_by_severity'][smell['severity']].append(smell)
+                            total_metrics['smell_counts'][smell['type']] += 1
                     
                     # Add to duplication detector
-                    if duplication_detector:
-                        duplication_detector.add_file(str(file_path), content)
+                    if 'duplication_hashes' in result:
+                        duplication_detector.add_line_hashes(file_path, result['duplication_hashes'])
                 
-                except (SyntaxError, UnicodeDecodeError):
-                    continue
                 except Exception:
                     continue
             
@@ -444,77 +789,78 @@ class CodeQualityMetricsTool(Tool):
             
             # Overall metrics
             avg_complexity = total_metrics['total_complexity'] / max(1, total_metrics['files_analyzed'])
-            avg_maintainability = sum(f['maintainability'] for f in total_metrics['file_details']) / max(1, len(total_metrics['file_details'])) if total_metrics['file_details'] else 0
+            maintainability_count = total_metrics['maintainability_count']
+            avg_maintainability = total_metrics['maintainability_total'] / maintainability_count if maintainability_count else 0
             
-            output_lines.append(f"📋 **Summary**")
-            output_lines.append(f"   • Files analyzed: {total_metrics['files_analyzed']}")
-            output_lines.append(f"   • Total lines: {total_metrics['total_lines']:,}")
-            output_lines.append(f"   • Functions: {total_metrics['total_functions']}")
-            output_lines.append(f"   • Classes: {total_metrics['total_classes']}")
+            write("📋 **Summary**\n")
+            write(f"   • Files analyzed: {total_metrics['files_analyzed']}\n")
+            write(f"   • Total lines: {total_metrics['total_lines']:,}\n")
+            write(f"   • Functions: {total_metrics['total_functions']}\n")
+            write(f"   • Classes: {total_metrics['total_classes']}\n")
             
             if "complexity" in metrics_to_calculate:
-                output_lines.append(f"\n🔄 **Complexity Analysis**")
-                output_lines.append(f"   • Average cyclomatic complexity: {avg_complexity:.1f}")
-                output_lines.append(f"   • High complexity files: {total_metrics['high_complexity_functions']}")
-                complexity_grade = self._get_quality_grade(max(0, 100 - avg_complexity * 2))
-                output_lines.append(f"   • Complexity grade: {complexity_grade}")
+                write("\n🔄 **Complexity Analysis**\n")
+                write(f"   • Average cyclomatic complexity: {avg_complexity:.1f}\n")
+                write(f"   • High complexity files: {total_metrics['high_complexity_functions']}\n")
+                complexity_grade = _quality_grade(max(0, 100 - avg_complexity * 2))
+                write(f"   • Complexity grade: {complexity_grade}\n")
             
-            if "maintainability" in metrics_to_calculate and total_metrics['file_details']:
-                output_lines.append(f"\n🔧 **Maintainability**")
-                output_lines.append(f"   • Average maintainability index: {avg_maintainability:.1f}")
-                maintainability_grade = self._get_quality_grade(avg_maintainability)
-                output_lines.append(f"   • Maintainability grade: {maintainability_grade}")
+            if "maintainability" in metrics_to_calculate and maintainability_count:
+                write("\n🔧 **Maintainability**\n")
+                write(f"   • Average maintainability index: {avg_maintainability:.1f}\n")
+                maintainability_grade = _quality_grade(avg_maintainability)
+                write(f"   • Maintainability grade: {maintainability_grade}\n")
             
             # Code smells
-            if "smells" in metrics_to_calculate and total_metrics['smells']:
-                smell_counts = Counter(smell['type'] for smell in total_metrics['smells'])
-                output_lines.append(f"\n🚨 **Code Smells ({len(total_metrics['smells'])} total)**")
+            smell_counts = total_metrics['smell_counts']
+            if "smells" in metrics_to_calculate and smell_counts:
+                write(f"\n🚨 **Code Smells ({sum(smell_counts.values())} total)**\n")
                 for smell_type, count in smell_counts.most_common():
-                    output_lines.append(f"   • {smell_type.replace('_', ' ').title()}: {count}")
+                    write(f"   • {smell_type.replace('_', ' ').title()}: {count}\n")
                 
                 # Show worst smells
-                high_severity = [s for s in total_metrics['smells'] if s['severity'] == 'high']
+                high_severity = total_metrics['smells_by_severity']['high']
                 if high_severity:
-                    output_lines.append(f"\n⚠️ **Critical Issues**")
-                    for smell in high_severity[:5]:  # Show top 5
-                        output_lines.append(f"   • {smell['message']}")
-                        output_lines.append(f"     📁 {smell['file']}:{smell['line']}")
+                    write("\n⚠️ **Critical Issues**\n")
+                    for smell in high_severity[:CRITICAL_SMELLS_SHOWN]:
+                        write(f"   • {smell['message']}\n")
+                        write(f"     📁 {smell['file']}:{smell['line']}\n")
             
             # Duplication analysis
             if duplication_detector:
                 duplicates = duplication_detector.find_duplicates()
                 if duplicates:
                     total_duplicated_lines = sum(d['duplicate_lines'] * (d['occurrences'] - 1) for d in duplicates)
-                    output_lines.append(f"\n📋 **Code Duplication**")
-                    output_lines.append(f"   • Duplicate blocks: {len(duplicates)}")
-                    output_lines.append(f"   • Duplicated lines: {total_duplicated_lines}")
+                    write("\n📋 **Code Duplication**\n")
+                    write(f"   • Duplicate blocks: {len(duplicates)}\n")
+                    write(f"   • Duplicated lines: {total_duplicated_lines}\n")
                     
                     # Show worst duplications
                     for dup in duplicates[:3]:
-                        output_lines.append(f"\n   🔄 {dup['duplicate_lines']} lines duplicated {dup['occurrences']} times:")
+                        write(f"\n   🔄 {dup['duplicate_lines']} lines duplicated {dup['occurrences']} times:\n")
                         for loc in dup['locations'][:3]:  # Show first 3 locations
-                            output_lines.append(f"      📁 {loc['file']}:{loc['start_line']}")
+                            write(f"      📁 {loc['file']}:{loc['start_line']}\n")
             
             # Detailed file breakdown
-            if detailed and total_metrics['file_details']:
-                output_lines.append(f"\n📄 **File Details**")
-                sorted_files = sorted(total_metrics['file_details'], key=lambda x: x['maintainability'])
+            if detailed and maintainability_count:
+                write("\n📄 **File Details**\n")
                 
-                for file_detail in sorted_files[:10]:  # Show worst 10 files
-                    metrics = file_detail['metrics']
-                    output_lines.append(f"\n   📁 {file_detail['file']}")
-                    output_lines.append(f"      Grade: {file_detail['grade']} (MI: {file_detail['maintainability']:.1f})")
-                    output_lines.append(f"      Complexity: {metrics['cyclomatic_complexity']}, LOC: {metrics['lines_of_code']}")
-                    output_lines.append(f"      Functions: {metrics['function_count']}, Classes: {metrics['class_count']}")
+                # Descending heap keys are ascending maintainability, ties in file order
+                for neg_maintainability, _, file_path, metrics in sorted(total_metrics['worst_files'], reverse=True):
+                    maintainability = -neg_maintainability
+                    write(f"\n   📁 {file_path}\n")
+                    write(f"      Grade: {_quality_grade(maintainability)} (MI: {maintainability:.1f})\n")
+                    write(f"      Complexity: {metrics['cyclomatic_complexity']}, LOC: {metrics['lines_of_code']}\n")
+                    write(f"      Functions: {metrics['function_count']}, Classes: {metrics['class_count']}\n")
             
             # Overall grade
             overall_score = (avg_maintainability + max(0, 100 - avg_complexity * 2)) / 2
-            overall_grade = self._get_quality_grade(overall_score)
-            output_lines.append(f"\n🎯 **Overall Quality Grade: {overall_grade}** (Score: {overall_score:.1f}/100)")
+            overall_grade = _quality_grade(overall_score)
+            write(f"\n🎯 **Overall Quality Grade: {overall_grade}** (Score: {overall_score:.1f}/100)")
             
             return ToolResult(
                 success=True,
-                output="\n".join(output_lines),
+                output=buf.getvalue(),
                 action_description=f"Analyzed {total_metrics['files_analyzed']} files"
             )
         
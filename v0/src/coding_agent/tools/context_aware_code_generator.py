@@ -1,91 +1,221 @@
 """Context-aware code generation tool that adapts to existing codebase patterns."""
 
 import ast
+import copy
+import hashlib
 import re
 import os
+import sys
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple, Set
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Set, Union
 from collections import defaultdict, Counter
 from .base import Tool
+from .file_walk import walk_tree
+from .json_cache import JsonLRUStore
+from .process_pool import map_in_processes
 from ..types import ToolResult
 from ..providers.base import ModelProvider
 
 
+# Per-file pattern fragments, keyed by a digest of the interpreter version and file content
+PATTERN_CACHE_PATH = Path.home() / ".cache" / "coding_agent" / "patterns" / "fragments.json"
+# Bump when the extracted fragment layout changes so stale entries are ignored
+PATTERN_CACHE_VERSION = 3
+# Least recently used fragments beyond this many are dropped on save
+PATTERN_CACHE_MAX_ENTRIES = 20000
+# Python files sampled per analyzed directory, in walk order
+MAX_CONTEXT_FILES = 50
+# Larger files are usually generated or vendored and say little about house style
+MAX_CONTEXT_FILE_BYTES = 256 * 1024
+# Consolidated patterns kept in memory for recently analyzed paths
+PATTERN_MEMO_SIZE = 32
+# Fewer uncached files than this are parsed in this process; see map_in_processes
+PARALLEL_PARSE_MIN_FILES = 16
+# Node fields that hold nested statements; every pattern the analyzer records is a statement
+STATEMENT_FIELDS = ('body', 'handlers', 'orelse', 'finalbody', 'cases')
+# Substrings of an imported module name that reveal the framework in use
+FRAMEWORK_INDICATORS = {
+    'flask': 'Flask',
+    'django': 'Django',
+    'fastapi': 'FastAPI',
+    'sqlalchemy': 'SQLAlchemy',
+    'pytest': 'Pytest',
+    'unittest': 'unittest',
+    'asyncio': 'AsyncIO',
+    'pydantic': 'Pydantic'
+}
+FRAMEWORK_PATTERN = re.compile('|'.join(map(re.escape, FRAMEWORK_INDICATORS)))
+# Naming shapes matched one name per line over newline-joined ASCII names
+CAMEL_CASE_PATTERN = re.compile(r'^[^_\n][^_A-Z\n]*[A-Z][^_\n]*$', re.MULTILINE)
+PASCAL_CASE_PATTERN = re.compile(r'^[A-Z][^A-Z\n]*[A-Z]', re.MULTILINE)
+
+
+def _fragment_key(content: Union[str, bytes]) -> str:
+    """Hash file content, and the grammar version parsing it, into a cache key."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{sys.version_info[0]}.{sys.version_info[1]}\0".encode('utf-8'))
+    digest.update(content if isinstance(content, bytes) else content.encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+def _file_patterns(content: Union[str, bytes]) -> Optional[Dict[str, Any]]:
+    """Parse one file and collect its raw patterns, or None if it does not parse."""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, UnicodeDecodeError):
+        return None
+    analyzer = CodebasePatternAnalyzer()
+    analyzer.visit(tree)
+    return analyzer._fragment()
+
+
+def _collect_file_patterns(contents: List[Union[str, bytes]]) -> List[Optional[Dict[str, Any]]]:
+    """Collect raw patterns for each file in order, across worker processes for large sets."""
+    results = map_in_processes(_file_patterns, contents, min_items=PARALLEL_PARSE_MIN_FILES)
+    if results is not None:
+        return results
+    
+    return [_file_patterns(content) for content in contents]
+
+
 class CodebasePatternAnalyzer(ast.NodeVisitor):
-    """Analyze codebase to extract patterns and conventions."""
+    """Analyze codebase to extract patterns and conventions.
+    
+    Each file's raw patterns are cached on disk by content digest, so warm runs
+    over unchanged files skip both parsing and visiting. With enable_cache off,
+    fragments are only reused within this instance.
+    """
     
-    def __init__(self):
-        self.patterns = {
+    def __init__(self, cache_path: Optional[Path] = None, enable_cache: bool = True):
+        self.cache_path = Path(cache_path) if cache_path else PATTERN_CACHE_PATH
+        self._cache = JsonLRUStore(self.cache_path, PATTERN_CACHE_VERSION, ('fragments',),
+                                   PATTERN_CACHE_MAX_ENTRIES, enabled=enable_cache)
+        self._function_depth = 0
+        self._functions = []
+        self._classes = []
+        self._variables = []
+        self._constants = []
+        self._class_hierarchies = {}
+        self._imports = Counter()
+        self._docstring_style = None
+        self._type_hints = False
+        self._async_usage = False
+        self._exception_types = Counter()
+        self._frameworks = set()
+        self._decorators = Counter()
+        self._base_classes = Counter()
+    
+    @property
+    def patterns(self) -> Dict[str, Any]:
+        """Raw collected patterns, grouped by kind."""
+        return {
             'naming_conventions': {
-                'functions': [],
-                'classes': [],
-                'variables': [],
-                'constants': []
+                'functions': self._functions,
+                'classes': self._classes,
+                'variables': self._variables,
+                'constants': self._constants
             },
             'architectural_patterns': {
-                'class_hierarchies': {},
-                'common_imports': Counter(),
-                'design_patterns': [],
-                'error_handling': [],
-                'logging_patterns': []
+                'class_hierarchies': self._class_hierarchies,
+                'common_imports': self._imports
             },
             'style_conventions': {
-                'docstring_style': None,
-                'type_hints': False,
-                'async_usage': False,
-                'exception_types': Counter(),
-                'return_patterns': []
+                'docstring_style': self._docstring_style,
+                'type_hints': self._type_hints,
+                'async_usage': self._async_usage,
+                'exception_types': self._exception_types
             },
             'framework_patterns': {
-                'frameworks': set(),
-                'common_decorators': Counter(),
-                'base_classes': Counter(),
-                'interface_patterns': []
+                'frameworks': self._frameworks,
+                'common_decorators': self._decorators,
+                'base_classes': self._base_classes
             }
         }
     
-    def analyze_codebase(self, files_content: Dict[str, str]) -> Dict[str, Any]:
-        """Analyze multiple files to extract patterns."""
-        for file_path, content in files_content.items():
-            try:
-                tree = ast.parse(content)
+    def analyze_codebase(self, files_content: Dict[str, Union[str, bytes]]) -> Dict[str, Any]:
+        """Analyze multiple files to extract patterns; raw bytes are decoded by the parser."""
+        cache = self._cache
+        fragments = cache.section('fragments')
+        keys = [_fragment_key(content) for content in files_content.values()]
+        missing = {key: content for key, content in zip(keys, files_content.values()) if key not in fragments}
+        for key, fragment in zip(missing, _collect_file_patterns(list(missing.values()))):
+            cache.put('fragments', key, fragment)
+        
+        for file_path, key in zip(files_content, keys):
+            fragment = cache.touch('fragments', key)
+            if fragment is not None:
                 self.current_file = file_path
-                self.visit(tree)
-            except (SyntaxError, UnicodeDecodeError):
-                continue
+                self._merge_patterns(fragment)
         
+        cache.save()
         return self._consolidate_patterns()
     
+    def _fragment(self) -> Dict[str, Any]:
+        """Return the raw patterns of a single-file pass as a flat fragment."""
+        return {
+            'functions': self._functions,
+            'classes': self._classes,
+            'variables': self._variables,
+            'constants': self._constants,
+            'class_hierarchies': self._class_hierarchies,
+            'imports': self._imports,
+            'docstring_style': self._docstring_style,
+            'type_hints': self._type_hints,
+            'async_usage': self._async_usage,
+            'exception_types': self._exception_types,
+            'frameworks': self._frameworks,
+            'decorators': self._decorators,
+            'base_classes': self._base_classes
+        }
+    
+    def _merge_patterns(self, fragment: Dict[str, Any]):
+        """Fold one file's raw patterns into the running totals, in file order."""
+        self._functions.extend(fragment['functions'])
+        self._classes.extend(fragment['classes'])
+        self._variables.extend(fragment['variables'])
+        self._constants.extend(fragment['constants'])
+        self._class_hierarchies.update(fragment['class_hierarchies'])
+        self._imports.update(fragment['imports'])
+        
+        if fragment['docstring_style']:
+            self._docstring_style = fragment['docstring_style']
+        self._type_hints = self._type_hints or fragment['type_hints']
+        self._async_usage = self._async_usage or fragment['async_usage']
+        self._exception_types.update(fragment['exception_types'])
+        
+        self._frameworks.update(fragment['frameworks'])
+        self._decorators.update(fragment['decorators'])
+        self._base_classes.update(fragment['base_classes'])
+    
+    def generic_visit(self, node):
+        """Descend into nested statements only, skipping expression subtrees."""
+        for field in STATEMENT_FIELDS:
+            for child in getattr(node, field, ()):
+                self.visit(child)
+    
     def visit_Import(self, node):
         """Track import patterns."""
         for alias in node.names:
-            self.patterns['architectural_patterns']['common_imports'][alias.name] += 1
+            self._imports[alias.name] += 1
     
     def visit_ImportFrom(self, node):
         """Track from-import patterns."""
         if node.module:
-            self.patterns['architectural_patterns']['common_imports'][node.module] += 1
-            
-            # Detect frameworks
-            framework_indicators = {
-                'flask': 'Flask',
-                'django': 'Django',
-                'fastapi': 'FastAPI',
-                'sqlalchemy': 'SQLAlchemy',
-                'pytest': 'Pytest',
-                'unittest': 'unittest',
-                'asyncio': 'AsyncIO',
-                'pydantic': 'Pydantic'
-            }
+            self._imports[node.module] += 1
             
-            for framework, name in framework_indicators.items():
-                if framework in node.module.lower():
-                    self.patterns['framework_patterns']['frameworks'].add(name)
+            # Detect frameworks; one scan finds every indicator, which are rarely present
+            found = FRAMEWORK_PATTERN.findall(node.module.lower())
+            if found:
+                for framework, name in FRAMEWORK_INDICATORS.items():
+                    if framework in found:
+                        self._frameworks.add(name)
     
     def visit_FunctionDef(self, node):
         """Analyze function patterns."""
         # Naming conventions
-        self.patterns['naming_conventions']['functions'].append(node.name)
+        self._functions.append(node.name)
         
         # Docstring style
         if node.body and isinstance(node.body[0], ast.Expr) and isinstance(node.body[0].value, ast.Constant):
@@ -95,39 +225,42 @@ class CodebasePatternAnalyzer(ast.NodeVisitor):
         
         # Type hints
         if node.returns or any(arg.annotation for arg in node.args.args):
-            self.patterns['style_conventions']['type_hints'] = True
+            self._type_hints = True
         
         # Decorators
         for decorator in node.decorator_list:
             if isinstance(decorator, ast.Name):
-                self.patterns['framework_patterns']['common_decorators'][decorator.id] += 1
-        
-        # Error handling patterns
-        for stmt in ast.walk(node):
-            if isinstance(stmt, ast.Try):
-                self._analyze_error_handling(stmt)
+                self._decorators[decorator.id] += 1
         
+        self._function_depth += 1
         self.generic_visit(node)
+        self._function_depth -= 1
     
     def visit_AsyncFunctionDef(self, node):
         """Track async patterns."""
-        self.patterns['style_conventions']['async_usage'] = True
+        self._async_usage = True
         self.visit_FunctionDef(node)
     
+    def visit_Try(self, node):
+        """Track error handling patterns inside functions."""
+        if self._function_depth:
+            self._analyze_error_handling(node)
+        self.generic_visit(node)
+    
     def visit_ClassDef(self, node):
         """Analyze class patterns."""
         # Naming conventions
-        self.patterns['naming_conventions']['classes'].append(node.name)
+        self._classes.append(node.name)
         
         # Base classes
         for base in node.bases:
             if isinstance(base, ast.Name):
-                self.patterns['framework_patterns']['base_classes'][base.id] += 1
+                self._base_classes[base.id] += 1
         
         # Class hierarchy
         if node.bases:
             base_names = [base.id for base in node.bases if isinstance(base, ast.Name)]
-            self.patterns['architectural_patterns']['class_hierarchies'][node.name] = base_names
+            self._class_hierarchies[node.name] = base_names
         
         self.generic_visit(node)
     
@@ -138,26 +271,26 @@ class CodebasePatternAnalyzer(ast.NodeVisitor):
                 name = target.id
                 # Detect constants (all caps)
                 if name.isupper():
-                    self.patterns['naming_conventions']['constants'].append(name)
+                    self._constants.append(name)
                 else:
-                    self.patterns['naming_conventions']['variables'].append(name)
+                    self._variables.append(name)
     
     def _analyze_docstring_style(self, docstring: str):
         """Analyze docstring style patterns."""
         if '"""' in docstring:
             if docstring.count('\n') > 2 and 'Args:' in docstring:
-                self.patterns['style_conventions']['docstring_style'] = 'google'
+                self._docstring_style = 'google'
             elif 'Parameters' in docstring and '----------' in docstring:
-                self.patterns['style_conventions']['docstring_style'] = 'numpy'
+                self._docstring_style = 'numpy'
             else:
-                self.patterns['style_conventions']['docstring_style'] = 'basic'
+                self._docstring_style = 'basic'
     
     def _analyze_error_handling(self, try_node: ast.Try):
         """Analyze error handling patterns."""
         for handler in try_node.handlers:
             if handler.type:
                 if isinstance(handler.type, ast.Name):
-                    self.patterns['style_conventions']['exception_types'][handler.type.id] += 1
+                    self._exception_types[handler.type.id] += 1
     
     def _consolidate_patterns(self) -> Dict[str, Any]:
         """Consolidate and analyze collected patterns."""
@@ -165,23 +298,23 @@ class CodebasePatternAnalyzer(ast.NodeVisitor):
         
         # Naming conventions analysis
         consolidated['naming'] = {
-            'function_style': self._analyze_naming_style(self.patterns['naming_conventions']['functions']),
-            'class_style': self._analyze_naming_style(self.patterns['naming_conventions']['classes'], is_class=True),
-            'variable_style': self._analyze_naming_style(self.patterns['naming_conventions']['variables'])
+            'function_style': self._analyze_naming_style(self._functions),
+            'class_style': self._analyze_naming_style(self._classes, is_class=True),
+            'variable_style': self._analyze_naming_style(self._variables)
         }
         
         # Most common patterns
-        consolidated['common_imports'] = dict(self.patterns['architectural_patterns']['common_imports'].most_common(10))
-        consolidated['common_decorators'] = dict(self.patterns['framework_patterns']['common_decorators'].most_common(5))
-        consolidated['common_bases'] = dict(self.patterns['framework_patterns']['base_classes'].most_common(5))
-        consolidated['frameworks'] = list(self.patterns['framework_patterns']['frameworks'])
+        consolidated['common_imports'] = dict(self._imports.most_common(10))
+        consolidated['common_decorators'] = dict(self._decorators.most_common(5))
+        consolidated['common_bases'] = dict(self._base_classes.most_common(5))
+        consolidated['frameworks'] = list(self._frameworks)
         
         # Style preferences
         consolidated['style'] = {
-            'docstring_style': self.patterns['style_conventions']['docstring_style'],
-            'uses_type_hints': self.patterns['style_conventions']['type_hints'],
-            'uses_async': self.patterns['style_conventions']['async_usage'],
-            'common_exceptions': dict(self.patterns['style_conventions']['exception_types'].most_common(5))
+            'docstring_style': self._docstring_style,
+            'uses_type_hints': self._type_hints,
+            'uses_async': self._async_usage,
+            'common_exceptions': dict(self._exception_types.most_common(5))
         }
         
         return consolidated
@@ -191,27 +324,113 @@ class CodebasePatternAnalyzer(ast.NodeVisitor):
         if not names:
             return 'unknown'
         
-        snake_case_count = sum(1 for name in names if '_' in name and name.islower())
-        camel_case_count = sum(1 for name in names if any(c.isupper() for c in name[1:]) and '_' not in name)
-        pascal_case_count = sum(1 for name in names if name[0].isupper() and any(c.isupper() for c in name[1:]))
+        # Regexes scan all names in one C-level pass; isupper() is Unicode-aware, so
+        # non-ASCII names keep the per-character checks
+        joined = '\n'.join(names)
+        ascii_only = joined.isascii()
         
         if is_class:
+            if ascii_only:
+                pascal_case_count = len(PASCAL_CASE_PATTERN.findall(joined))
+            else:
+                pascal_case_count = sum(1 for name in names if name[0].isupper() and any(c.isupper() for c in name[1:]))
             return 'PascalCase' if pascal_case_count > len(names) * 0.7 else 'mixed'
+        
+        snake_case_count = sum(1 for name in names if '_' in name and name.islower())
+        if snake_case_count > len(names) * 0.7:
+            return 'snake_case'
+        
+        if ascii_only:
+            camel_case_count = len(CAMEL_CASE_PATTERN.findall(joined))
         else:
-            if snake_case_count > len(names) * 0.7:
-                return 'snake_case'
-            elif camel_case_count > len(names) * 0.7:
-                return 'camelCase'
-            else:
-                return 'mixed'
+            camel_case_count = sum(1 for name in names if any(c.isupper() for c in name[1:]) and '_' not in name)
+        if camel_case_count > len(names) * 0.7:
+            return 'camelCase'
+        return 'mixed'
+
+
+def _iter_context_files(root: str) -> Iterator[str]:
+    """Yield .py files under root in walk order, skipping ignored dirs and oversized files."""
+    for entry in walk_tree(root):
+        if not entry.name.endswith('.py'):
+            continue
+        try:
+            if entry.stat().st_size <= MAX_CONTEXT_FILE_BYTES:
+                yield entry.path
+        except OSError:
+            continue
+
+
+def _read_files_for_analysis(context_path: str) -> Dict[str, bytes]:
+    """Read the Python files under a path that pattern analysis looks at."""
+    files_content = {}
+    context_path_obj = Path(context_path)
+    
+    if not context_path_obj.exists():
+        return {}
+    
+    # Get Python files for analysis
+    if context_path_obj.is_file():
+        files_to_analyze = [str(context_path_obj)]
+    else:
+        files_to_analyze = list(islice(_iter_context_files(str(context_path_obj)), MAX_CONTEXT_FILES))
+    
+    for file_path in files_to_analyze:
+        try:
+            with open(file_path, 'rb') as f:
+                content = f.read()
+            if content.strip():  # Skip empty files
+                files_content[file_path] = content
+        except Exception:
+            continue
+    
+    return files_content
+
+
+def _tree_signature(root: str) -> Tuple[int, int, int]:
+    """Summarize the Python files under root as (count, newest mtime_ns, total size).
+    
+    Directory mtimes count towards the newest mtime too, so adding, removing or
+    renaming a file changes the signature even when no file was edited.
+    """
+    try:
+        root_stat = os.stat(root)
+    except OSError:
+        return (0, 0, 0)
+    if not os.path.isdir(root):
+        return (1, root_stat.st_mtime_ns, root_stat.st_size)
+    
+    count, newest, total_size = 0, root_stat.st_mtime_ns, 0
+    for entry in walk_tree(root, include_dirs=True):
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                newest = max(newest, entry.stat(follow_symlinks=False).st_mtime_ns)
+            elif entry.name.endswith('.py'):
+                entry_stat = entry.stat()
+                count += 1
+                newest = max(newest, entry_stat.st_mtime_ns)
+                total_size += entry_stat.st_size
+        except OSError:
+            continue
+    return (count, newest, total_size)
+
+
+@lru_cache(maxsize=PATTERN_MEMO_SIZE)
+def _analyze_tree(resolved_path: str, signature: Tuple[int, int, int], enable_cache: bool = True) -> Dict[str, Any]:
+    """Analyze the files under a resolved path; memoized per tree signature."""
+    files_content = _read_files_for_analysis(resolved_path)
+    if not files_content:
+        return {}
+    return CodebasePatternAnalyzer(enable_cache=enable_cache).analyze_codebase(files_content)
 
 
 class ContextAwareCodeGenerator(Tool):
     """Generate code that follows existing codebase patterns and conventions."""
     
-    def __init__(self, model_provider: Optional[ModelProvider] = None):
+    def __init__(self, model_provider: Optional[ModelProvider] = None, enable_cache: bool = True):
         self.model_provider = model_provider
-        self.patterns_cache = {}
+        # When off, per-file pattern fragments are not read from or written to disk
+        self.enable_cache = enable_cache
     
     @property
     def name(self) -> str:
@@ -280,48 +499,15 @@ class ContextAwareCodeGenerator(Tool):
     def is_destructive(self) -> bool:
         return True  # Can write files
     
-    def _get_files_for_analysis(self, context_path: str) -> Dict[str, str]:
+    def _get_files_for_analysis(self, context_path: str) -> Dict[str, bytes]:
         """Get files to analyze for context patterns."""
-        files_content = {}
-        context_path_obj = Path(context_path)
-        
-        if not context_path_obj.exists():
-            return {}
-        
-        # Get Python files for analysis
-        if context_path_obj.is_file():
-            files_to_analyze = [context_path_obj]
-        else:
-            files_to_analyze = list(context_path_obj.rglob("*.py"))[:50]  # Limit to avoid performance issues
-        
-        for file_path in files_to_analyze:
-            try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                if content.strip():  # Skip empty files
-                    files_content[str(file_path)] = content
-            except Exception:
-                continue
-        
-        return files_content
+        return _read_files_for_analysis(context_path)
     
     def _analyze_codebase_patterns(self, context_path: str) -> Dict[str, Any]:
-        """Analyze codebase to extract patterns."""
-        # Check cache first
-        cache_key = str(Path(context_path).resolve())
-        if cache_key in self.patterns_cache:
-            return self.patterns_cache[cache_key]
-        
-        files_content = self._get_files_for_analysis(context_path)
-        if not files_content:
-            return {}
-        
-        analyzer = CodebasePatternAnalyzer()
-        patterns = analyzer.analyze_codebase(files_content)
-        
-        # Cache results
-        self.patterns_cache[cache_key] = patterns
-        return patterns
+        """Analyze codebase to extract patterns, reusing results for unchanged trees."""
+        resolved = str(Path(context_path).resolve())
+        # The memoized result is shared by every caller, so each gets its own copy to modify
+        return copy.deepcopy(_analyze_tree(resolved, _tree_signature(resolved), self.enable_cache))
     
     def _get_similar_code_context(self, similar_code_path: str) -> Dict[str, Any]:
         """Analyze similar existing code for reference."""
@@ -0,0 +1,49 @@
+"""Project tree walking shared by the tools that scan source directories."""
+
+import os
+from typing import Iterator
+
+# Vendor, build, cache and virtualenv directories never worth descending into
+# (hidden directories such as .git, .venv and .mypy_cache are skipped separately)
+SKIP_DIRS = frozenset({
+    '__pycache__', 'node_modules', 'target', 'build', 'dist', 'venv', 'env', 'site-packages'
+})
+
+
+def walk_tree(root: str, skip_dirs: frozenset = SKIP_DIRS, include_dirs: bool = False) -> Iterator[os.DirEntry]:
+    """Yield the DirEntry of every regular file under root, in os.walk order.
+    
+    Each directory's files come before its subdirectories, which are walked
+    depth-first in readdir order. Hidden directories, those in skip_dirs and
+    symlinked ones are never descended into. With include_dirs, the
+    directories descended into are yielded as well.
+    
+    Uses os.scandir with an explicit stack, so entry types come from the
+    readdir data and entry.stat() is cached on the entry for callers that
+    need sizes or mtimes. Unreadable directories and entries are skipped.
+    """
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not name.startswith('.') and name not in skip_dirs:
+                        subdirs.append(entry)
+                elif entry.is_file():
+                    yield entry
+            except OSError:
+                continue
+        
+        # Reverse so subdirectories are popped in directory order
+        for entry in reversed(subdirs):
+            stack.append(entry.path)
+        if include_dirs:
+            yield from subdirs
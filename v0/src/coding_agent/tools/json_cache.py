@@ -0,0 +1,88 @@
+"""Persistent JSON cache of LRU-ordered sections shared by the analysis tools."""
+
+import json
+import os
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+class JsonLRUStore:
+    """A versioned JSON file holding named dicts kept in least-recently-used order.
+    
+    The file is read on first use and written atomically by save(), only when
+    an entry was added, removed or reordered, so the recency of pure hits is
+    persisted too. Each section is trimmed to max_entries from its oldest end
+    on save. A disabled store never touches the disk and only lives in memory.
+    """
+    
+    def __init__(self, path: Path, version: int, sections: Tuple[str, ...], max_entries: int, enabled: bool = True):
+        self.path = Path(path)
+        self.version = version
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._section_names = sections
+        self._sections: Optional[Dict[str, Dict[str, Any]]] = None
+        self._dirty = False
+    
+    def section(self, name: str) -> Dict[str, Any]:
+        """Return a section for lookups; change it through put(), touch() and discard()."""
+        if self._sections is None:
+            self._sections = self._load()
+        return self._sections[name]
+    
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Read the cache file, discarding unreadable or stale versions."""
+        empty = {name: {} for name in self._section_names}
+        if not self.enabled:
+            return empty
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != self.version:
+                raise ValueError("stale cache version")
+            return {name: dict(data[name]) for name in self._section_names}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return empty
+    
+    def touch(self, name: str, key: str) -> Any:
+        """Return a present entry, moving it to the most recently used end."""
+        entries = self.section(name)
+        if next(reversed(entries)) != key:
+            entries[key] = entries.pop(key)
+            self._dirty = True
+        return entries[key]
+    
+    def put(self, name: str, key: str, value: Any):
+        """Store an entry as the most recently used one."""
+        entries = self.section(name)
+        entries.pop(key, None)
+        entries[key] = value
+        self._dirty = True
+    
+    def discard(self, name: str, key: str):
+        """Remove an entry if present."""
+        entries = self.section(name)
+        if key in entries:
+            del entries[key]
+            self._dirty = True
+    
+    def save(self):
+        """Trim and atomically persist the cache if it changed; failures are ignored."""
+        if not self._dirty:
+            return
+        for entries in self._sections.values():
+            for key in list(islice(entries, max(0, len(entries) - self.max_entries))):
+                del entries[key]
+        if not self.enabled:
+            self._dirty = False
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.version, **self._sections}, f, default=list)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError:
+            pass
@@ -0,0 +1,36 @@
+"""Process pool helper shared by the CPU-bound scanning and analysis tools."""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+# Workers are always spawned, whatever the platform default: forking copies
+# the agent's live threads (file watcher, provider request pools) and can
+# deadlock. Spawned workers re-import the main module, so every launcher
+# must keep its top-level code under `if __name__ == '__main__'`.
+POOL_START_METHOD = "spawn"
+
+
+def map_in_processes(func: Callable, items: Sequence, min_items: int, chunksize: Optional[int] = None,
+                     initializer: Optional[Callable] = None, initargs: Tuple = ()) -> Optional[List[Any]]:
+    """Map func over items in worker processes, keeping their order.
+    
+    Returns None when there are fewer than min_items items, only one core, or
+    the pool cannot be started, so the caller runs its serial loop instead.
+    Exceptions raised by func itself propagate.
+    """
+    workers = os.cpu_count() or 1
+    if len(items) < min_items or workers < 2:
+        return None
+    
+    if chunksize is None:
+        chunksize = max(1, len(items) // (4 * workers))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(POOL_START_METHOD),
+                                 initializer=initializer, initargs=initargs) as executor:
+            return list(executor.map(func, items, chunksize=chunksize))
+    except (BrokenProcessPool, OSError) as e:
+        print(f"Warning: Could not run worker processes, continuing serially: {e}")
+        return None
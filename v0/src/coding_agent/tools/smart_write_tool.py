@@ -379,37 +379,32 @@ class SmartWriteTool(Tool):
         skip_until_dedent = False
         current_indent = 0
         
+        # Line prefixes that open a conflicting function or class
+        conflict_prefixes = tuple(
+            f"def {conflict.split(':')[1]}(" if conflict.startswith("function:") else f"class {conflict.split(':')[1]}"
+            for conflict in conflicts
+            if conflict.startswith(("function:", "class:"))
+        )
+        
         for line in lines:
-            # Check if this line starts a conflicting item
-            line_stripped = line.strip()
-            should_skip = False
+            # One lstrip() per line gives both the content and the indent width
+            line_stripped = line.lstrip()
+            line_indent = len(line) - len(line_stripped)
             
-            for conflict in conflicts:
-                if conflict.startswith("function:"):
-                    func_name = conflict.split(":")[1]
-                    if line_stripped.startswith(f"def {func_name}("):
-                        should_skip = True
-                        current_indent = len(line) - len(line.lstrip())
-                        skip_until_dedent = True
-                        break
-                elif conflict.startswith("class:"):
-                    class_name = conflict.split(":")[1]
-                    if line_stripped.startswith(f"class {class_name}"):
-                        should_skip = True
-                        current_indent = len(line) - len(line.lstrip())
-                        skip_until_dedent = True
-                        break
+            # Check if this line starts a conflicting item
+            if line_stripped.startswith(conflict_prefixes):
+                current_indent = line_indent
+                skip_until_dedent = True
             
             if skip_until_dedent:
-                if line.strip() == "":
+                if not line_stripped:
                     continue  # Skip empty lines
-                line_indent = len(line) - len(line.lstrip())
-                if line_indent <= current_indent and line.strip():
+                if line_indent <= current_indent:
                     skip_until_dedent = False
                     # Don't skip this line, it's at the same or less indent
                     new_lines.append(line)
                 # else: skip this line as it's part of the conflicting item
-            elif not should_skip:
+            else:
                 new_lines.append(line)
         
         # Add the new content